@@ -0,0 +1,53 @@
+"""
+Measures cold import latency and the number of modules loaded when importing parts of the package.
+
+Every measurement runs in a fresh interpreter so that nothing is cached in sys.modules. Run from the repository root:
+    python benchmarks/startup.py --repeat 20 src.environments src.agents
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+__author__ = 'Aditya Gudimella'
+
+_PROBE = """
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, len(set(sys.modules) - before))
+"""
+
+
+def measure(module, repeat=10):
+    """
+    Imports module in `repeat` fresh interpreters.
+
+    :param module: dotted name of the module to import
+    :param repeat: number of interpreters to spawn
+    :return: (list of import times in seconds, number of modules loaded by the import)
+    """
+    timings, n_modules = [], None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                                check=True, capture_output=True, text=True).stdout.split()
+        timings.append(float(output[0]))
+        n_modules = int(output[1])
+    return timings, n_modules
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=['src', 'src.environments', 'src.agents', 'src.utils.run_utils'])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(args)
+    print(f'{"module":<30}{"median ms":>12}{"min ms":>12}{"modules":>10}')
+    for module in args.modules:
+        timings, n_modules = measure(module, repeat=args.repeat)
+        print(f'{module:<30}{statistics.median(timings) * 1e3:>12.2f}{min(timings) * 1e3:>12.2f}{n_modules:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,19 @@
-from .q_table import QTable, QTableParams
+from ..utils.lazy_imports import lazy_attributes
+
+__getattr__, __dir__, __all__ = lazy_attributes(
+    __name__, globals(),
+    attributes={
+        'QTable': '.q_table',
+        'QTableParams': '.q_table',
+        'EligibilityTraces': '.eligibility_traces',
+        'LambdaParams': '.eligibility_traces',
+        'SarsaLambda': '.eligibility_traces',
+        'WatkinsQLambda': '.eligibility_traces',
+        'TileCoder': '.tile_coding',
+        'LinearQ': '.tile_coding',
+        'PlanningParams': '.planning',
+        'TabularModel': '.planning',
+        'DynaQ': '.planning',
+        'PrioritizedSweeping': '.planning',
+    },
+    submodules=['.base', '.eligibility_traces', '.planning', '.q_table', '.tile_coding'])
@@ -0,0 +1,155 @@
+"""
+SARSA(λ) and Watkins Q(λ) agents that share QTable's storage.
+
+Eligibility traces are kept as an active set of (state, action) pairs with their trace values, so an update touches only
+the pairs whose trace is above trace_cutoff instead of sweeping the whole table.
+"""
+import numpy as np
+
+from .q_table import QTable, QTableParams
+
+__author__ = 'Aditya Gudimella'
+
+
+class LambdaParams(QTableParams):
+    def __init__(self, exploration_rate=0.5, discount_factor=0.9, learning_rate=0.1, trace_decay=0.9,
+                 trace_mode='replacing', trace_cutoff=1e-3):
+        """
+
+        :param trace_decay: λ. Traces are multiplied by discount_factor * trace_decay after every step.
+        :param trace_mode: 'replacing' sets the trace of the visited pair to 1, 'accumulating' adds 1 to it.
+        :param trace_cutoff: Traces smaller than this are dropped from the active set.
+        """
+        super().__init__(exploration_rate=exploration_rate, discount_factor=discount_factor,
+                         learning_rate=learning_rate)
+        if trace_mode not in ('replacing', 'accumulating'):
+            raise ValueError(f"trace_mode must be one of ['replacing', 'accumulating']. Provided {trace_mode}")
+        self.trace_decay = trace_decay
+        self.trace_mode = trace_mode
+        self.trace_cutoff = trace_cutoff
+
+
+class EligibilityTraces:
+    """
+    Sparse eligibility traces over a (state_dim, action_dim) table.
+
+    The first n_active entries of states, actions and values form the active set. slots[state, action] is the position
+    of the pair in the active set, or -1 if its trace is zero.
+    """
+
+    def __init__(self, state_dim, action_dim, capacity=64):
+        self.slots = np.full(shape=(state_dim, action_dim), fill_value=-1, dtype=np.int64)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=float)
+        self.n_active = 0
+
+    def __len__(self):
+        return self.n_active
+
+    @property
+    def active(self):
+        """
+        :return: (states, actions, values) views of the active set
+        """
+        n = self.n_active
+        return self.states[:n], self.actions[:n], self.values[:n]
+
+    def visit(self, state, action, mode='replacing') -> None:
+        slot = self.slots[state, action]
+        if slot == -1:
+            if self.n_active == len(self.values):
+                self._grow()
+            slot = self.n_active
+            self.slots[state, action] = slot
+            self.states[slot], self.actions[slot], self.values[slot] = state, action, 0.
+            self.n_active += 1
+        if mode == 'replacing':
+            self.values[slot] = 1.
+        else:
+            self.values[slot] += 1.
+
+    def decay(self, factor, cutoff=0.) -> None:
+        """
+        Multiplies every active trace by factor and drops the ones that fall below cutoff.
+        """
+        states, actions, values = self.active
+        values *= factor
+        keep = values >= cutoff
+        if np.all(keep):
+            return
+        self.slots[states[~keep], actions[~keep]] = -1
+        n_keep = np.count_nonzero(keep)
+        # Compact the active set. Boolean indexing copies, so the overlapping assignment is safe.
+        self.states[:n_keep], self.actions[:n_keep], self.values[:n_keep] = states[keep], actions[keep], values[keep]
+        self.n_active = n_keep
+        self.slots[self.states[:n_keep], self.actions[:n_keep]] = np.arange(n_keep)
+
+    def clear(self) -> None:
+        states, actions, _ = self.active
+        self.slots[states, actions] = -1
+        self.n_active = 0
+
+    def _grow(self):
+        self.states, self.actions, self.values = (np.resize(array, 2 * len(array))
+                                                  for array in (self.states, self.actions, self.values))
+
+
+class SarsaLambda(QTable):
+    """ On-policy TD(λ) control for discrete state and action spaces
+
+    train_dict must contain state, action, new_state, reward and new_action, the action that will be taken in
+    new_state. It may contain done, which clears the traces at the end of an episode. Model.train provides both.
+    """
+
+    def __init__(self, action_dim, state_dim, params=None):
+        params = LambdaParams() if params is None else params
+        super().__init__(action_dim=action_dim, state_dim=state_dim, params=params)
+        self.trace_decay = self.params.trace_decay
+        self.trace_mode = self.params.trace_mode
+        self.trace_cutoff = self.params.trace_cutoff
+        self.traces = EligibilityTraces(state_dim=state_dim, action_dim=action_dim)
+
+    def train(self, train_dict):
+        state, action, new_state, reward = (train_dict[key]
+                                            for key in 'state action new_state reward'.split())
+        done, new_action = train_dict.get('done', False), train_dict.get('new_action')
+        target = 0. if done else self._bootstrap(new_state, new_action)
+        # Decide before updating, since the update can change Q(new_state, .) when new_state == state
+        cut_traces = done or self._cut_traces(new_state, new_action)
+        td_error = reward + self.discount_factor * target - self.state_action_value(state, action)
+        self._update_traced(state, action, td_error)
+        if cut_traces:
+            self.traces.clear()
+
+    def _bootstrap(self, new_state, new_action):
+        if new_action is None:
+            raise ValueError('SarsaLambda needs new_action in train_dict to bootstrap from')
+        return self.state_action_value(new_state, new_action)
+
+    def _cut_traces(self, new_state, new_action) -> bool:
+        return False
+
+    def _update_traced(self, state, action, td_error):
+        self.traces.visit(state, action, mode=self.trace_mode)
+        states, actions, values = self.traces.active
+        # (state, action) pairs in the active set are unique, so fancy-indexed += is safe
+        self._q_table[states, actions] += self.learning_rate * td_error * values
+        self.traces.decay(self.discount_factor * self.trace_decay, cutoff=self.trace_cutoff)
+
+
+class WatkinsQLambda(SarsaLambda):
+    """ Off-policy Q(λ) control for discrete state and action spaces
+
+    Bootstraps from the greedy action in new_state. If train_dict contains new_action and it is exploratory (not
+    greedy) according to Q before the update, the traces are cut after the update, since later rewards no longer follow
+    the greedy policy.
+    """
+
+    def _bootstrap(self, new_state, new_action):
+        return self.max_expected_reward_for_state(new_state)
+
+    def _cut_traces(self, new_state, new_action) -> bool:
+        if new_action is None:
+            return False
+        return self.state_action_value(new_state, new_action) < self.max_expected_reward_for_state(new_state)
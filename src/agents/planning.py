@@ -0,0 +1,283 @@
+"""
+Model based planning on top of QTable: Dyna-Q and prioritized sweeping.
+
+Both agents learn a tabular model of the environment from real steps and use it for extra, simulated Q-learning updates
+after every real step, trading cheap array operations for fewer expensive environment steps.
+"""
+import heapq
+
+import numpy as np
+
+from .q_table import QTable, QTableParams
+
+__author__ = 'Aditya Gudimella'
+
+
+class PlanningParams(QTableParams):
+    def __init__(self, exploration_rate=0.5, discount_factor=0.9, learning_rate=0.1, planning_steps=10,
+                 planning_batch_size=None, priority_threshold=1e-4):
+        """
+
+        :param planning_steps: Number of simulated updates after every real step
+        :param planning_batch_size: Number of simulated updates applied together as one array operation. Defaults to
+        planning_steps for Dyna-Q and to 1 for prioritized sweeping.
+        :param priority_threshold: Prioritized sweeping only queues (state, action) pairs whose TD error is larger
+        """
+        super().__init__(exploration_rate=exploration_rate, discount_factor=discount_factor,
+                         learning_rate=learning_rate)
+        self.planning_steps = planning_steps
+        self.planning_batch_size = planning_batch_size
+        self.priority_threshold = priority_threshold
+
+
+class TabularModel:
+    """
+    Transition counts and mean rewards observed for every (state, action) pair.
+
+    Pairs are flattened to sa = state * action_dim + action. Each distinct observed transition (sa, next state) gets a
+    slot in the slot_* arrays, which hold its source pair, next state, count and whether it ended the episode. A dict
+    maps every (sa, next state) to its slot, so updates take constant time.
+    Successors of pairs and predecessors of states are found with searchsorted in the slots sorted by pair or by next
+    state. Slots added since these indices were last built are scanned directly, and the indices are only rebuilt once
+    there are more than reindex_fraction times as many of them as indexed slots, so the cost of the sort is spread over
+    many new transitions.
+    """
+    min_unindexed = 256
+    reindex_fraction = 1 / 16
+
+    def __init__(self, state_dim, action_dim, capacity=1024):
+        self.state_dim, self.action_dim = state_dim, action_dim
+        self.visit_counts = np.zeros(state_dim * action_dim, dtype=np.int64)
+        self.reward_sums = np.zeros(state_dim * action_dim, dtype=float)
+        # The first n_pairs entries are the pairs observed so far
+        self.observed_pairs = np.zeros(capacity, dtype=np.int64)
+        self.n_pairs = 0
+        self.slot_sa = np.zeros(capacity, dtype=np.int64)
+        self.slot_next_state = np.zeros(capacity, dtype=np.int64)
+        self.slot_counts = np.zeros(capacity, dtype=np.int64)
+        self.slot_done = np.zeros(capacity, dtype=bool)
+        self.n_slots = 0
+        self._slot_of = {}
+        # Slots [0, _n_indexed) are covered by the sorted indices
+        self._n_indexed = 0
+        self._successor_order = self._successor_keys = np.zeros(0, dtype=np.int64)
+        self._predecessor_order = self._predecessor_keys = np.zeros(0, dtype=np.int64)
+
+    def update(self, state, action, reward, new_state, done=False) -> None:
+        sa = int(state * self.action_dim + action)
+        if not self.visit_counts[sa]:
+            if self.n_pairs == len(self.observed_pairs):
+                self.observed_pairs = _grown(self.observed_pairs)
+            self.observed_pairs[self.n_pairs] = sa
+            self.n_pairs += 1
+        self.visit_counts[sa] += 1
+        self.reward_sums[sa] += reward
+        slot = self._slot_of.get((sa, int(new_state)))
+        if slot is None:
+            if self.n_slots == len(self.slot_sa):
+                self.slot_sa, self.slot_next_state, self.slot_counts, self.slot_done = (
+                    _grown(array) for array in (self.slot_sa, self.slot_next_state, self.slot_counts, self.slot_done))
+            slot = self.n_slots
+            self.slot_sa[slot], self.slot_next_state[slot] = sa, new_state
+            self._slot_of[sa, int(new_state)] = slot
+            self.n_slots += 1
+        self.slot_counts[slot] += 1
+        self.slot_done[slot] = done
+
+    def mean_rewards(self, sa) -> np.ndarray:
+        return self.reward_sums[sa] / np.maximum(self.visit_counts[sa], 1)
+
+    def sample(self, size, rng) -> np.ndarray:
+        """
+        Samples simulated transitions as in Dyna-Q: observed pairs uniformly at random, then one observed transition of
+        every pair in proportion to how often it followed the pair.
+
+        :return: int ndarray of slots
+        """
+        pairs = self.observed_pairs[rng.integers(self.n_pairs, size=size)]
+        slots, group = self.successors(pairs)
+        order = np.argsort(group, kind='stable')
+        slots, group = slots[order], group[order]
+        # Draw a count in [0, visit count) for every pair and find the transition it falls on in the cumulative counts
+        cumulative_counts = np.cumsum(self.slot_counts[slots])
+        first = np.searchsorted(group, np.arange(size))
+        draws = cumulative_counts[first] - self.slot_counts[slots[first]] + rng.integers(self.visit_counts[pairs])
+        return slots[np.searchsorted(cumulative_counts, draws, side='right')]
+
+    def successors(self, sa):
+        """
+        :param sa: int ndarray of flattened (state, action) pairs
+        :return: (slots, group) where group[i] is the position in sa of the pair slots[i] starts from
+        """
+        self._index()
+        return self._lookup(self._successor_keys, self._successor_order, self.slot_sa,
+                            np.asarray(sa, dtype=np.int64))
+
+    def predecessors(self, states) -> np.ndarray:
+        """
+        :param states: int ndarray of states
+        :return: int ndarray of the distinct pairs observed to lead to any of the states
+        """
+        self._index()
+        slots, _ = self._lookup(self._predecessor_keys, self._predecessor_order, self.slot_next_state,
+                                np.asarray(states, dtype=np.int64))
+        return np.unique(self.slot_sa[slots])
+
+    def expected_targets(self, sa, q_table, discount_factor) -> np.ndarray:
+        """
+        Expected one-step targets r(s, a) + discount_factor * E[max_a' Q(s', a')] of a batch of observed pairs under
+        the model. Only the rows of q_table of the successors are read.
+
+        :param sa: int ndarray of flattened (state, action) pairs, all observed at least once
+        :param q_table: ndarray of shape (state_dim, action_dim)
+        :return: ndarray with the same shape as sa
+        """
+        slots, group = self.successors(sa)
+        next_values = np.where(self.slot_done[slots], 0., q_table[self.slot_next_state[slots]].max(axis=1))
+        expected_next = (np.bincount(group, weights=self.slot_counts[slots] * next_values, minlength=len(sa)) /
+                         self.visit_counts[sa])
+        return self.mean_rewards(sa) + discount_factor * expected_next
+
+    def _lookup(self, sorted_keys, order, slot_keys, queries):
+        """
+        Finds the slots whose key (their pair or next state) is in queries.
+
+        :param sorted_keys: slot_keys of the indexed slots, sorted
+        :param order: indexed slots in the order of sorted_keys
+        :param slot_keys: slot_sa or slot_next_state
+        :return: (slots, position in queries of the key of every slot)
+        """
+        starts = np.searchsorted(sorted_keys, queries, side='left')
+        lengths = np.searchsorted(sorted_keys, queries, side='right') - starts
+        group = np.repeat(np.arange(len(queries)), lengths)
+        positions = np.arange(lengths.sum()) - (np.cumsum(lengths) - lengths)[group] + starts[group]
+        # Unindexed slots are few, filter them with isin before matching them to queries
+        unindexed = np.arange(self._n_indexed, self.n_slots)
+        unindexed = unindexed[np.isin(slot_keys[unindexed], queries)]
+        unindexed_group, matched = np.nonzero(queries[:, None] == slot_keys[unindexed])
+        return np.concatenate([order[positions], unindexed[matched]]), np.concatenate([group, unindexed_group])
+
+    def _index(self) -> None:
+        if self.n_slots - self._n_indexed <= max(self.min_unindexed, self.reindex_fraction * self._n_indexed):
+            return
+        n = self.n_slots
+        self._successor_order = np.argsort(self.slot_sa[:n], kind='stable')
+        self._successor_keys = self.slot_sa[self._successor_order]
+        self._predecessor_order = np.argsort(self.slot_next_state[:n], kind='stable')
+        self._predecessor_keys = self.slot_next_state[self._predecessor_order]
+        self._n_indexed = n
+
+
+def _grown(array) -> np.ndarray:
+    # New entries must start at zero, so pad with zeros rather than np.resize's repeated data
+    return np.concatenate([array, np.zeros_like(array)])
+
+
+def _real_update(agent: QTable, state, action, reward, new_state, done):
+    """
+    Q-learning update for a real step. Unlike QTable.train, terminal steps don't bootstrap from new_state, which
+    keeps real and simulated updates consistent.
+    """
+    agent.train_batch(dict(state=[state], action=[action], new_state=[new_state], reward=[reward], done=[done]))
+
+
+class DynaQ(QTable):
+    """ Q-learning with planning_steps simulated updates from a learned model after every real step
+
+    The simulated transitions are sampled from the model (observed pairs uniformly, then an outcome of the pair in
+    proportion to its count) and applied as batches of planning_batch_size updates, each batch being a single
+    vectorized Q-learning update.
+    train_dict may contain done, which is remembered by the model so that planning doesn't bootstrap past the end of
+    an episode.
+    """
+
+    def __init__(self, action_dim, state_dim, params=None, rng=None):
+        params = PlanningParams() if params is None else params
+        super().__init__(action_dim=action_dim, state_dim=state_dim, params=params)
+        self.planning_steps = self.params.planning_steps
+        self.planning_batch_size = self.params.planning_batch_size or self.planning_steps
+        self.model = TabularModel(state_dim=state_dim, action_dim=action_dim)
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def train(self, train_dict):
+        state, action, new_state, reward = (train_dict[key]
+                                            for key in 'state action new_state reward'.split())
+        done = train_dict.get('done', False)
+        _real_update(self, state, action, reward, new_state, done)
+        self.model.update(state, action, reward, new_state, done=done)
+        self.plan()
+
+    def plan(self) -> None:
+        model = self.model
+        for start in range(0, self.planning_steps, self.planning_batch_size):
+            slots = model.sample(min(self.planning_batch_size, self.planning_steps - start), self.rng)
+            sa = model.slot_sa[slots]
+            self.train_batch(dict(state=sa // self.action_dim, action=sa % self.action_dim,
+                                  new_state=model.slot_next_state[slots], reward=model.mean_rewards(sa),
+                                  done=model.slot_done[slots]))
+
+
+class PrioritizedSweeping(QTable):
+    """ Q-learning with planning focused on the (state, action) pairs whose values are most out of date
+
+    Pairs are kept in a heap ordered by the size of their expected TD error under the model. After every real step the
+    planning_steps most urgent pairs get an expected update, and the predecessors of their states are re-prioritized
+    with one vectorized computation per batch.
+    """
+
+    def __init__(self, action_dim, state_dim, params=None):
+        params = PlanningParams() if params is None else params
+        super().__init__(action_dim=action_dim, state_dim=state_dim, params=params)
+        self.planning_steps = self.params.planning_steps
+        self.planning_batch_size = self.params.planning_batch_size or 1
+        self.priority_threshold = self.params.priority_threshold
+        self.model = TabularModel(state_dim=state_dim, action_dim=action_dim)
+        # Current priority of every pair. Heap entries whose priority doesn't match it anymore are stale.
+        self.priorities = np.zeros(state_dim * action_dim, dtype=float)
+        self._queue = []
+
+    def train(self, train_dict):
+        state, action, new_state, reward = (train_dict[key]
+                                            for key in 'state action new_state reward'.split())
+        done = train_dict.get('done', False)
+        _real_update(self, state, action, reward, new_state, done)
+        self.model.update(state, action, reward, new_state, done=done)
+        self._push(np.array([state * self.action_dim + action]))
+        self.plan()
+
+    def plan(self) -> None:
+        n_updates = 0
+        while self._queue and n_updates < self.planning_steps:
+            sa = self._pop(min(self.planning_batch_size, self.planning_steps - n_updates))
+            if not sa.size:
+                break
+            n_updates += len(sa)
+            targets = self.model.expected_targets(sa, self._q_table, self.discount_factor)
+            q_values = self._q_table.reshape(-1)
+            q_values[sa] += self.learning_rate * (targets - q_values[sa])
+            predecessors = self.model.predecessors(np.unique(sa // self.action_dim))
+            if predecessors.size:
+                self._push(predecessors)
+
+    def _push(self, sa) -> None:
+        """
+        Recomputes the priorities of a batch of pairs and queues the ones above the threshold.
+        """
+        targets = self.model.expected_targets(sa, self._q_table, self.discount_factor)
+        priorities = np.abs(targets - self._q_table.reshape(-1)[sa])
+        urgent = priorities > self.priority_threshold
+        self.priorities[sa] = np.where(urgent, priorities, 0.)
+        for pair, priority in zip(sa[urgent].tolist(), priorities[urgent].tolist()):
+            heapq.heappush(self._queue, (-priority, pair))
+
+    def _pop(self, size) -> np.ndarray:
+        """
+        Pops up to size distinct pairs with the highest current priority, skipping stale heap entries.
+        """
+        popped = []
+        while self._queue and len(popped) < size:
+            negative_priority, pair = heapq.heappop(self._queue)
+            if self.priorities[pair] == -negative_priority:
+                self.priorities[pair] = 0.
+                popped.append(pair)
+        return np.array(popped, dtype=np.int64)
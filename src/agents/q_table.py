@@ -30,6 +30,24 @@ class QTable:
                                                               self.discount_factor * max_future_reward -
                                                               old_state_action_value)
 
+    def train_batch(self, train_dict):
+        """Q-learning update on a batch of transitions, e.g. read back from a trajectory store
+
+        :param train_dict: dict of 1d arrays state, action, new_state, reward and optionally done. Terminal
+        transitions don't bootstrap from new_state.
+        :return:
+        """
+        state, action, new_state, reward = (np.asarray(train_dict[key])
+                                            for key in 'state action new_state reward'.split())
+        done = np.asarray(train_dict.get('done', False), dtype=bool)
+        max_future_reward = np.where(done, 0., self._q_table[new_state, :].max(axis=-1))
+        td_error = reward + self.discount_factor * max_future_reward - self._q_table[state, action]
+        # A pair that appears several times in the batch moves by its mean TD error, so that the step size does not
+        # grow with the batch size
+        unique_pairs, inverse = np.unique(state * self.action_dim + action, return_inverse=True)
+        mean_td_error = np.bincount(inverse, weights=td_error) / np.bincount(inverse)
+        self._q_table.reshape(-1)[unique_pairs] += self.learning_rate * mean_td_error
+
     def act(self, state, stochastic=True):
         if stochastic:
             return np.argmax(self._q_table[state, :] + np.random.randn(1, self.action_dim))
@@ -0,0 +1,135 @@
+"""
+Hashed tile coding and a linear Q-learner built on it, for continuous state spaces.
+
+Every tiling covers the state space with a grid of tiles, shifted by a different offset. A state activates exactly one
+tile per tiling, and the coordinates of that tile are hashed into a weight vector of fixed size, so memory does not grow
+with the resolution of the tilings.
+"""
+import numpy as np
+
+from .q_table import QTableParams
+
+__author__ = 'Aditya Gudimella'
+
+
+class TileCoder:
+    """
+    Maps batches of continuous states to the indices of their active tiles.
+
+    Usage:
+    >>> coder = TileCoder(lows=[-1.2, -0.07], highs=[0.6, 0.07], n_tilings=8, tiles_per_dim=8, memory_size=4096)
+    >>> coder.tiles(states)  # states of shape (N, 2) -> indices of shape (N, 8)
+    """
+
+    def __init__(self, lows, highs, n_tilings=8, tiles_per_dim=8, memory_size=4096, seed=0):
+        """
+
+        :param lows: 1d array_like. Lower bound of every state dimension.
+        :param highs: 1d array_like. Upper bound of every state dimension.
+        :param n_tilings: Number of tilings, i.e. of active features per state
+        :param tiles_per_dim: int or 1d array_like. Number of tiles along every dimension of a tiling.
+        :param memory_size: Size of the weight vector the tiles are hashed into
+        :param seed: Seed of the hash function
+        """
+        self.lows = np.asarray(lows, dtype=float).ravel()
+        self.highs = np.asarray(highs, dtype=float).ravel()
+        if self.lows.shape != self.highs.shape or np.any(self.highs <= self.lows):
+            raise ValueError(f'highs must be greater than lows. Provided {self.lows} and {self.highs}')
+        self.n_dims = len(self.lows)
+        self.n_tilings = n_tilings
+        self.memory_size = memory_size
+        tiles_per_dim = np.broadcast_to(np.asarray(tiles_per_dim, dtype=float), self.lows.shape)
+        self.tile_widths = (self.highs - self.lows) / tiles_per_dim
+        # Asymmetric offsets (displacement 1, 3, 5, ... along each dimension) in units of tile widths
+        displacement = 2 * np.arange(self.n_dims) + 1
+        self.offsets = (np.arange(n_tilings)[:, None] * displacement / n_tilings) % 1.
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiplicative hashing of (tiling, tile coordinates)
+        self._multipliers = rng.integers(1, 2 ** 62, size=self.n_dims + 1, dtype=np.uint64) | np.uint64(1)
+
+    @classmethod
+    def from_domains(cls, domains, **kwargs):
+        """
+        Builds a tile coder covering the product of Domain objects.
+
+        :param domains: iterable of ai.environments.domains.Domain objects, one per state dimension
+        :param kwargs: passed to TileCoder
+        :return: TileCoder
+        """
+        domains = list(domains)
+        return cls(lows=[float(domain.lowerEndpoint()) for domain in domains],
+                   highs=[float(domain.upperEndpoint()) for domain in domains], **kwargs)
+
+    def tiles(self, states) -> np.ndarray:
+        """
+        :param states: array_like of shape (..., n_dims)
+        :return: int64 ndarray of shape (..., n_tilings) with indices in [0, memory_size)
+        """
+        states = np.asarray(states, dtype=float)
+        scaled = (states - self.lows) / self.tile_widths
+        # coordinates has shape (..., n_tilings, n_dims)
+        coordinates = np.floor(scaled[..., None, :] + self.offsets).astype(np.int64).astype(np.uint64)
+        tilings = np.arange(self.n_tilings, dtype=np.uint64)
+        hashed = coordinates @ self._multipliers[:-1] + tilings * self._multipliers[-1]
+        # Keep the well mixed high bits before reducing into the weight vector
+        return ((hashed >> np.uint64(16)) % np.uint64(self.memory_size)).astype(np.int64)
+
+
+class LinearQ:
+    """ Linear Q function over hashed tile features, for continuous states and discrete actions
+
+    Has the same interface as QTable, and every method also accepts batches of states.
+    """
+
+    def __init__(self, action_dim, tile_coder: TileCoder, params=None):
+        self.action_dim = action_dim
+        self.tile_coder = tile_coder
+        self._weights = np.zeros(shape=(tile_coder.memory_size, action_dim), dtype=float)
+        self.params = QTableParams() if params is None else params
+        self.discount_factor = self.params.discount_factor
+        # The learning rate is shared between the n_tilings active features
+        self.learning_rate = self.params.learning_rate / tile_coder.n_tilings
+
+    def action_values(self, state) -> np.ndarray:
+        """
+        :param state: array_like of shape (..., n_dims)
+        :return: ndarray of shape (..., action_dim)
+        """
+        return self._weights[self.tile_coder.tiles(state)].sum(axis=-2)
+
+    def train(self, train_dict):
+        """
+        One step Q-learning update. state, action, new_state and reward may be batches, and train_dict may contain
+        done, in which case terminal transitions don't bootstrap.
+        """
+        state, action, new_state, reward = (train_dict[key]
+                                            for key in 'state action new_state reward'.split())
+        done = np.asarray(train_dict.get('done', False), dtype=bool)
+        tiles = self.tile_coder.tiles(state)
+        action = np.asarray(action)
+        old_state_action_value = np.take_along_axis(self._weights[tiles].sum(axis=-2), action[..., None],
+                                                    axis=-1)[..., 0]
+        max_future_reward = np.where(done, 0., self.max_expected_reward_for_state(new_state))
+        td_error = reward + self.discount_factor * max_future_reward - old_state_action_value
+        # Samples of a batch sharing a (tile, action) weight move it by their mean TD error, so that the step size does
+        # not grow with the batch size
+        keys = (tiles * self.action_dim + action[..., None]).ravel()
+        errors = np.broadcast_to(np.asarray(td_error, dtype=float)[..., None], tiles.shape).ravel()
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        mean_errors = np.bincount(inverse, weights=errors) / np.bincount(inverse)
+        self._weights.reshape(-1)[unique_keys] += self.learning_rate * mean_errors
+
+    # train already handles batches
+    train_batch = train
+
+    def act(self, state, stochastic=True):
+        action_values = self.action_values(state)
+        if stochastic:
+            action_values = action_values + np.random.randn(*action_values.shape)
+        return action_values.argmax(axis=-1)
+
+    def state_action_value(self, state, action):
+        return np.take_along_axis(self.action_values(state), np.asarray(action)[..., None], axis=-1)[..., 0]
+
+    def max_expected_reward_for_state(self, state):
+        return self.action_values(state).max(axis=-1)
@@ -1,3 +1,20 @@
-from .base import *
-# from .domains import *
-from .states import *
+"""
+Submodules are imported lazily, the first time one of their attributes is accessed, so that importing the package
+doesn't pull in numpy or Ranger.
+"""
+from ..utils.lazy_imports import lazy_attributes
+
+__getattr__, __dir__, __all__ = lazy_attributes(
+    __name__, globals(),
+    attributes={
+        'Environment': '.base',
+        'EnvironmentIterator': '.base',
+        'MDP': '.base',
+        'Bandit': '.bandits',
+        'Domain': '.domains',
+        'StateIndexer': '.indexers',
+        'MixedRadixIndexer': '.indexers',
+        'BoardIndexer': '.indexers',
+        'State': '.states',
+    },
+    submodules=['.bandits', '.base', '.domains', '.indexers', '.states'])
@@ -2,7 +2,6 @@
 All sorts of bandit problem environments go here.
 """
 import numpy as np
-from Ranger import Range
 
 from ai.environments import MDP, Domain
 
@@ -13,6 +12,7 @@ class Bandit(MDP):
     """
 
     def __init__(self, n_arms=2, distributions=None):
+        from Ranger import Range  # Optional dependency, only needed once a bandit is created
         super().__init__(states=None, actions=Domain(domain=Range.closed(1, int(n_arms))))
         self.n_arms = int(n_arms)
         if distributions is not None:
@@ -50,7 +50,15 @@ class EnvironmentIterator:  # Todo: Make it raise an error when iteration is fin
     ...     iterator.send(action=action)
     ...     print(iterator.state, iterator.new_state, iterator.step_reward, iterator.done)
     """
-    def __init__(self, env, num_episodes, render_env=False, log=None):
+    def __init__(self, env, num_episodes, render_env=False, log=None, recorder=None):
+        """
+
+        :param env:
+        :param num_episodes:
+        :param render_env:
+        :param log:
+        :param recorder: Optional TrajectoryRecorder every transition sent is recorded to
+        """
         self.env = env
         self.num_episodes = num_episodes
         self.episode_id = 0
@@ -59,6 +67,7 @@ class EnvironmentIterator:  # Todo: Make it raise an error when iteration is fin
         self.render_env = render_env
         self.new_state, self.step_reward, self.done = [None] * 3
         self.log = log
+        self.recorder = recorder
         self._reset()
 
     def __iter__(self):
@@ -81,6 +90,8 @@ class EnvironmentIterator:  # Todo: Make it raise an error when iteration is fin
     def send(self, action):
         self.new_state, self.step_reward, self.done, _ = self.env.step(action)
         self.total_episode_reward += self.step_reward
+        if self.recorder is not None:
+            self.recorder.record(self.state, action, self.step_reward, self.new_state, self.done)
 
     def _reset(self):
         if self.total_episode_reward is not None:
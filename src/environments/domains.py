@@ -21,6 +21,7 @@ class Domain:
         element being one of the two strings ['open', 'closed']
         """
         import operator
+        from Ranger import Range  # Optional dependency, only needed once a domain is created
         if not isinstance(domain, Range):
             assert len(domain) == 2 and len(boundaries) == 2
             boundaries = ''.join([boundaries[0].lower(), boundaries[1].lower().capitalize()])
@@ -61,4 +62,5 @@ class Domain:
 
 
 if __name__ == '__main__':
+    from Ranger import Range
     domain = Domain(Range.open(1, 5))
@@ -0,0 +1,195 @@
+"""
+Maps structured states (boards, tuples of discrete values) to dense integer indices and back.
+
+QTable only understands integer states in [0, state_dim). The indexers here provide that mapping for whole batches of
+states at once, so training loops never have to hash tuples or dicts on every step.
+
+Usage:
+>>> indexer = BoardIndexer(board_size=3, symmetric=True)
+>>> agent = QTable(action_dim=9, state_dim=indexer.n_states)
+>>> rows = indexer.index(boards)  # boards has shape (N, 3, 3), rows has shape (N,)
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+__author__ = 'Aditya Gudimella'
+
+
+class StateIndexer(ABC):
+    """
+    Base class for all state indexers.
+
+    Subclasses map an array of states of shape (..., *state_shape) to an int64 array of shape (...) with values in
+    [0, n_states), and implement the inverse mapping in `state`.
+    """
+    n_states = None
+
+    @abstractmethod
+    def index(self, states) -> np.ndarray:
+        return NotImplemented
+
+    @abstractmethod
+    def state(self, indices) -> np.ndarray:
+        return NotImplemented
+
+    def __len__(self):
+        return self.n_states
+
+
+class MixedRadixIndexer(StateIndexer):
+    """
+    Ranks vectors of bounded integers in a product space.
+
+    The i-th component of a state takes values in [lows[i], lows[i] + radices[i]). The rank is the mixed-radix number
+    whose digits are the offsets from lows, with the first component being the most significant digit.
+    """
+
+    def __init__(self, radices, lows=None):
+        """
+
+        :param radices: 1d int array_like. Number of values each component of the state can take.
+        :param lows: 1d int array_like or int. Smallest value of each component. Defaults to 0.
+        """
+        self.radices = np.asarray(radices, dtype=np.int64).ravel()
+        if np.any(self.radices < 1):
+            raise ValueError(f'radices must all be positive. Provided {self.radices}')
+        self.lows = np.broadcast_to(np.asarray(0 if lows is None else lows, dtype=np.int64),
+                                    self.radices.shape).copy()
+        n_states = 1
+        for radix in self.radices.tolist():  # Python ints so that the product cannot silently overflow
+            n_states *= radix
+        if n_states > np.iinfo(np.int64).max:
+            raise ValueError(f'State space of size {n_states} is too large to be ranked into int64')
+        self.n_states = n_states
+        # place_values[i] = prod(radices[i + 1:])
+        self.place_values = np.append(np.cumprod(self.radices[:0:-1])[::-1], 1).astype(np.int64)
+
+    @classmethod
+    def from_domains(cls, domains):
+        """
+        Builds an indexer for the product of integer valued Domain objects.
+
+        :param domains: iterable of ai.environments.domains.Domain objects with int endpoints
+        :return: MixedRadixIndexer
+        """
+        lows, radices = [], []
+        for domain in domains:
+            low, high = domain.lowerEndpoint(), domain.upperEndpoint()
+            if not isinstance(low, (int, np.integer)):
+                raise ValueError(f'Only integer domains can be indexed. Provided {domain} with endpoint {low}')
+            if not domain.contains(low):
+                low += 1
+            if not domain.contains(high):
+                high -= 1
+            lows.append(low)
+            radices.append(high - low + 1)
+        return cls(radices=radices, lows=lows)
+
+    def index(self, states) -> np.ndarray:
+        """
+        Ranks a batch of states.
+
+        :param states: int array_like of shape (..., k) where k = len(radices)
+        :return: int64 ndarray of shape (...)
+        """
+        return self._rank(states)
+
+    def state(self, indices) -> np.ndarray:
+        """
+        Inverse of `index`.
+
+        :param indices: int array_like of shape (...)
+        :return: int64 ndarray of shape (..., k)
+        """
+        return self._unrank(self._check_indices(indices))
+
+    def _check_indices(self, indices) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any(indices < 0) or np.any(indices >= self.n_states):
+            raise ValueError(f'indices must be in [0, {self.n_states})')
+        return indices
+
+    def _rank(self, states) -> np.ndarray:
+        digits = np.asarray(states, dtype=np.int64) - self.lows
+        if np.any(digits < 0) or np.any(digits >= self.radices):
+            raise ValueError('states contain values outside the bounds of the indexer')
+        return digits @ self.place_values
+
+    def _unrank(self, indices) -> np.ndarray:
+        return (indices[..., None] // self.place_values) % self.radices + self.lows
+
+
+class BoardIndexer(MixedRadixIndexer):
+    """
+    Ranks square boards (like TicTacToe.board) cell by cell in base n_values.
+
+    With symmetric=True, boards that are rotations or reflections of each other share an index, and the indices are
+    made dense again, which shrinks a 3x3 TicTacToe table from 3 ** 9 = 19683 rows to 2862. The lookup tables for the
+    symmetric case enumerate every board, so symmetric=True is refused for more than max_symmetric_boards boards.
+    """
+    max_symmetric_boards = 2 ** 22
+    _chunk_size = 2 ** 16
+
+    def __init__(self, board_size=3, n_values=3, low=-1, symmetric=False, dtype=np.int8):
+        """
+
+        :param board_size: Boards have shape (board_size, board_size)
+        :param n_values: Number of values a cell can take. 3 for TicTacToe (Ο, Φ, Χ)
+        :param low: Smallest value a cell can take. -1 for TicTacToe (Mark.Ο)
+        :param symmetric: If True, fold the 8 rotations/reflections of a board into a single index.
+        :param dtype: dtype of boards returned by `state`
+        """
+        super().__init__(radices=[n_values] * board_size ** 2, lows=low)
+        self.board_size = board_size
+        self.symmetric = symmetric
+        self.dtype = dtype
+        if symmetric:
+            if self.n_states > self.max_symmetric_boards:
+                raise ValueError(f'symmetric=True enumerates all {self.n_states} boards, more than '
+                                 f'max_symmetric_boards={self.max_symmetric_boards}. Use symmetric=False instead.')
+            # Enumerate in chunks so that the 8 symmetries of all boards are never in memory at once
+            raw = np.concatenate([self._canonical_rank(self._unrank(np.arange(start, min(start + self._chunk_size,
+                                                                                         self.n_states))))
+                                  for start in range(0, self.n_states, self._chunk_size)])
+            # _raw_of_dense maps dense index -> canonical raw rank, _dense_of_raw maps raw rank -> dense index
+            self._raw_of_dense, self._dense_of_raw = np.unique(raw, return_inverse=True)
+            self.n_states = len(self._raw_of_dense)
+
+    def index(self, states) -> np.ndarray:
+        """
+
+        :param states: array_like of shape (..., board_size, board_size)
+        :return: int64 ndarray of shape (...)
+        """
+        states = np.asarray(states)
+        flat = states.reshape(states.shape[:-2] + (-1,))
+        if self.symmetric:
+            # _dense_of_raw covers every raw rank, so boards don't need to be canonicalized first
+            return self._dense_of_raw[self._rank(flat)]
+        return self._rank(flat)
+
+    def state(self, indices) -> np.ndarray:
+        """
+        Inverse of `index`. When symmetric, returns the canonical representative of each class of boards.
+
+        :param indices: int array_like of shape (...)
+        :return: ndarray of shape (..., board_size, board_size)
+        """
+        indices = self._check_indices(indices)
+        if self.symmetric:
+            indices = self._raw_of_dense[indices]
+        return self._unrank(indices).reshape(indices.shape + (self.board_size, self.board_size)).astype(self.dtype)
+
+    def _canonical_rank(self, flat_boards) -> np.ndarray:
+        """
+        Smallest raw rank among the 8 symmetries of each board.
+
+        :param flat_boards: array of shape (..., board_size ** 2)
+        :return: int64 ndarray of shape (...)
+        """
+        boards = np.asarray(flat_boards).reshape(np.shape(flat_boards)[:-1] + (self.board_size, self.board_size))
+        symmetries = np.stack([np.rot90(flipped, k, axes=(-2, -1))
+                               for flipped in (boards, np.flip(boards, axis=-1))
+                               for k in range(4)])
+        return self._rank(symmetries.reshape(symmetries.shape[:-2] + (-1,))).min(axis=0)
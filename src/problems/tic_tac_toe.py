@@ -113,6 +113,123 @@ class TicTacToe:
     pass
 
 
+class BatchedTicTacToe:
+    """
+    Advances many tic-tac-toe games in lockstep.
+
+    All boards live in a single (n_games, board_size, board_size) int8 array using the Mark values. Actions are flat
+    cell indices in [0, board_size ** 2). Games that are over ignore the actions given to them, so a batch can be
+    stepped until every game has finished.
+    """
+
+    def __init__(self, n_games=1, board_size=3, boards=None, to_move=None, first: Mark = TicTacToe.AGENT):
+        """
+
+        :param n_games: Number of games to simulate. Ignored if boards is given.
+        :param board_size: Ignored if boards is given.
+        :param boards: int array_like of shape (n_games, board_size, board_size) to start from.
+        :param to_move: int array_like of shape (n_games,) with the Mark value of the player to move in each game.
+        :param first: Mark of the player to move in every game, if to_move is not given.
+        """
+        if boards is None:
+            boards = np.zeros(shape=(n_games, board_size, board_size), dtype=np.int8)
+        self.boards = np.array(boards, dtype=np.int8)
+        self.n_games, self.board_size = self.boards.shape[0], self.boards.shape[1]
+        self.n_cells = self.board_size ** 2
+        if to_move is None:
+            to_move = np.full(self.n_games, first.value, dtype=np.int8)
+        self.to_move = np.broadcast_to(np.asarray(to_move, dtype=np.int8), (self.n_games,)).copy()
+        self.winners = self._winners(self.boards)
+        self.done = (self.winners != Mark.Φ.value) | ~np.any(self.boards == Mark.Φ.value, axis=(1, 2))
+
+    def copy(self):
+        return BatchedTicTacToe(boards=self.boards, to_move=self.to_move)
+
+    @property
+    def legal_moves(self) -> np.ndarray:
+        """
+        :return: bool ndarray of shape (n_games, n_cells). All False for games that are over.
+        """
+        return (self.boards.reshape(self.n_games, -1) == Mark.Φ.value) & ~self.done[:, None]
+
+    def step(self, actions) -> None:
+        """
+        Plays one move in every game that is not over.
+
+        :param actions: int array_like of shape (n_games,) with flat cell indices
+        :return: None
+        """
+        actions = np.asarray(actions)
+        active = np.flatnonzero(~self.done)
+        flat = self.boards.reshape(self.n_games, -1)
+        if np.any(flat[active, actions[active]] != Mark.Φ.value):
+            raise ValueError('Illegal move: position has already been set')
+        flat[active, actions[active]] = self.to_move[active]
+        self.to_move[active] *= -1
+        self.winners[active] = self._winners(self.boards[active])
+        self.done[active] = ((self.winners[active] != Mark.Φ.value) |
+                             ~np.any(flat[active] == Mark.Φ.value, axis=1))
+
+    def random_moves(self, rng=None) -> np.ndarray:
+        """
+        Samples a legal move uniformly at random for every game. Games that are over get move 0.
+
+        :param rng: numpy Generator
+        :return: int ndarray of shape (n_games,)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        keys = rng.random((self.n_games, self.n_cells))
+        keys[~self.legal_moves] = -1.
+        return keys.argmax(axis=1)
+
+    def play(self, policy=None, rng=None, record=False):
+        """
+        Steps every game until it is over.
+
+        :param policy: callable taking this object and returning an int array of shape (n_games,) of moves.
+        Defaults to uniformly random legal moves.
+        :param rng: numpy Generator used by the default policy
+        :param record: If True, return the trajectories of all games as well.
+        :return: winners, an int8 ndarray of shape (n_games,) with Mark values (Φ for a draw). If record is True, a
+        tuple (winners, dict(boards, to_move, actions, active)) where each entry is stacked over time on axis 0 and
+        active tells which games were still being played at that time step.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        policy = (lambda game: game.random_moves(rng)) if policy is None else policy
+        history = dict(boards=[], to_move=[], actions=[], active=[])
+        while not np.all(self.done):
+            actions = policy(self)
+            if record:
+                history['boards'].append(self.boards.copy())
+                history['to_move'].append(self.to_move.copy())
+                history['actions'].append(np.asarray(actions).copy())
+                history['active'].append(~self.done)
+            self.step(actions)
+        if record:
+            return self.winners.copy(), {key: np.stack(value) if value else np.empty(0)
+                                         for key, value in history.items()}
+        return self.winners.copy()
+
+    @staticmethod
+    def _winners(boards) -> np.ndarray:
+        """
+        Finds the winner of each board by looking at the sums of every row, column and both diagonals.
+
+        :param boards: int ndarray of shape (n_games, board_size, board_size)
+        :return: int8 ndarray of shape (n_games,) with the Mark value of the winner, Φ if there is none
+        """
+        board_size = boards.shape[-1]
+        boards = boards.astype(np.int64)
+        line_sums = np.concatenate([boards.sum(axis=1),
+                                    boards.sum(axis=2),
+                                    np.trace(boards, axis1=1, axis2=2)[:, None],
+                                    np.trace(boards[:, :, ::-1], axis1=1, axis2=2)[:, None]], axis=1)
+        winners = np.zeros(boards.shape[0], dtype=np.int8)
+        winners[np.any(line_sums == board_size * Mark.Χ.value, axis=1)] = Mark.Χ.value
+        winners[np.any(line_sums == board_size * Mark.Ο.value, axis=1)] = Mark.Ο.value
+        return winners
+
+
 if __name__ == '__main__':
     ttt = TicTacToe(board_size=3)
     ttt.print_board()
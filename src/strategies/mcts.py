@@ -0,0 +1,151 @@
+"""
+Monte Carlo Tree Search for tic-tac-toe with the whole tree stored in preallocated numpy arrays.
+
+One tree is grown per root board and all trees are searched in lockstep: every simulation descends, expands, rolls
+out and backs up all trees with array operations, using BatchedTicTacToe for the rollouts.
+
+Usage:
+>>> games = BatchedTicTacToe(n_games=1000)
+>>> search = MCTS(n_simulations=200)
+>>> winners, history = games.play(policy=search.policy, record=True)
+"""
+import numpy as np
+
+from ..problems.tic_tac_toe import BatchedTicTacToe, Mark
+
+__author__ = 'Aditya Gudimella'
+
+
+class MCTS:
+    """
+    UCT search over a batch of tic-tac-toe positions.
+
+    Node i of tree b is described by row (b, i) of the node arrays. Children of a node are allocated as one contiguous
+    block of n_cells slots when the node is first expanded, so children[b, i, a] is the node reached by playing cell a
+    (-1 while unexpanded or if the move is illegal). value_sums are stored from the point of view of the player who
+    made the move leading into the node, which is the player that picks that node during selection.
+    """
+
+    def __init__(self, n_simulations=100, exploration=1.4, board_size=3, rng=None):
+        """
+
+        :param n_simulations: Number of simulations run per search
+        :param exploration: Exploration constant c of the UCT formula Q + c * sqrt(ln(N_parent) / N_child)
+        :param board_size:
+        :param rng: numpy Generator used for rollouts
+        """
+        self.n_simulations = n_simulations
+        self.exploration = exploration
+        self.board_size = board_size
+        self.n_cells = board_size ** 2
+        self.max_nodes = 1 + n_simulations * self.n_cells
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def _allocate(self, n_trees):
+        shape = (n_trees, self.max_nodes)
+        self.visit_counts = np.zeros(shape, dtype=np.int64)
+        self.value_sums = np.zeros(shape, dtype=float)
+        self.children = np.full(shape + (self.n_cells,), -1, dtype=np.int64)
+        self.boards = np.zeros(shape + (self.board_size, self.board_size), dtype=np.int8)
+        self.to_move = np.zeros(shape, dtype=np.int8)
+        self.winners = np.zeros(shape, dtype=np.int8)
+        self.terminal = np.zeros(shape, dtype=bool)
+        self.n_nodes = np.ones(n_trees, dtype=np.int64)
+
+    def search(self, boards, to_move) -> np.ndarray:
+        """
+        Runs n_simulations simulations from each root position.
+
+        :param boards: int array_like of shape (n_trees, board_size, board_size)
+        :param to_move: int array_like of shape (n_trees,) with the Mark value of the player to move
+        :return: int ndarray of shape (n_trees, n_cells) with the visit counts of the children of each root
+        """
+        roots = BatchedTicTacToe(boards=boards, to_move=to_move)
+        n_trees = roots.n_games
+        trees = np.arange(n_trees)
+        self._allocate(n_trees)
+        self.boards[:, 0], self.to_move[:, 0] = roots.boards, roots.to_move
+        self.winners[:, 0], self.terminal[:, 0] = roots.winners, roots.done
+
+        for _ in range(self.n_simulations):
+            # Selection: walk down every tree until a leaf, i.e. a terminal or unexpanded node.
+            node = np.zeros(n_trees, dtype=np.int64)
+            path = [(trees, node.copy())]
+            descending = np.any(self.children[:, 0] != -1, axis=1) & ~self.terminal[:, 0]
+            while np.any(descending):
+                active = np.flatnonzero(descending)
+                node[active] = self._select(active, node[active])
+                path.append((active, node[active]))
+                descending[active] = (np.any(self.children[active, node[active]] != -1, axis=1) &
+                                      ~self.terminal[active, node[active]])
+
+            # Expansion: give every non-terminal leaf a block of children.
+            expand = np.flatnonzero(~self.terminal[trees, node])
+            if expand.size:
+                self._expand(expand, node[expand])
+
+            # Simulation: random rollouts from every leaf, in one batch.
+            rollout = BatchedTicTacToe(boards=self.boards[trees, node], to_move=self.to_move[trees, node])
+            winners = rollout.play(rng=self.rng)
+
+            # Backup: reward is +1 for the winner and -1 for the loser, seen by the player who moved into the node.
+            for path_trees, path_nodes in path:
+                self.visit_counts[path_trees, path_nodes] += 1
+                self.value_sums[path_trees, path_nodes] += winners[path_trees] * -self.to_move[path_trees, path_nodes]
+        root_children = self.children[:, 0]
+        return np.where(root_children != -1, np.take_along_axis(self.visit_counts, np.maximum(root_children, 0),
+                                                                axis=1), 0)
+
+    def policy(self, games: BatchedTicTacToe) -> np.ndarray:
+        """
+        Picks the most visited move for every game. Can be passed as the policy of BatchedTicTacToe.play.
+
+        :param games:
+        :return: int ndarray of shape (n_games,)
+        """
+        visit_counts = self.search(games.boards, games.to_move)
+        visit_counts = np.where(games.legal_moves, visit_counts, -1)
+        return visit_counts.argmax(axis=1)
+
+    def _select(self, trees, nodes) -> np.ndarray:
+        """
+        Picks the child maximizing UCT for each (tree, node) pair. Unvisited children are picked first.
+
+        :return: int ndarray of child node indices
+        """
+        children = self.children[trees, nodes]
+        legal = children != -1
+        safe_children = np.maximum(children, 0)
+        child_visits = np.take_along_axis(self.visit_counts[trees], safe_children, axis=1)
+        child_values = np.take_along_axis(self.value_sums[trees], safe_children, axis=1)
+        parent_visits = self.visit_counts[trees, nodes][:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            uct = (child_values / child_visits +
+                   self.exploration * np.sqrt(np.log(np.maximum(parent_visits, 1)) / child_visits))
+        # Unvisited children come first, in random order so that they are not always explored in the same order
+        unvisited = child_visits == 0
+        uct[unvisited] = np.finfo(float).max * self.rng.random(np.count_nonzero(unvisited))
+        uct[~legal] = -np.inf
+        return children[np.arange(len(trees)), uct.argmax(axis=1)]
+
+    def _expand(self, trees, nodes) -> None:
+        """
+        Allocates a block of n_cells children for each (tree, node) pair and fills in the legal ones.
+        """
+        first_child = self.n_nodes[trees]
+        if np.any(first_child + self.n_cells > self.max_nodes):
+            raise RuntimeError('Ran out of preallocated nodes')
+        self.n_nodes[trees] += self.n_cells
+        legal = self.boards[trees, nodes].reshape(len(trees), -1) == Mark.Φ.value
+        tree_idx, actions = np.nonzero(legal)
+        parents = nodes[tree_idx]
+        child = first_child[tree_idx] + actions
+        trees = trees[tree_idx]
+        self.children[trees, parents, actions] = child
+
+        games = BatchedTicTacToe(boards=self.boards[trees, parents], to_move=self.to_move[trees, parents])
+        games.step(actions)
+        self.boards[trees, child] = games.boards
+        self.to_move[trees, child] = games.to_move
+        self.winners[trees, child] = games.winners
+        self.terminal[trees, child] = games.done
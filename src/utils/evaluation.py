@@ -0,0 +1,188 @@
+"""
+Evaluates a trained QTable over many episodes in a process pool.
+
+Episode i is always run with the seed spawned for it from root_seed, whichever worker runs it, so results are identical
+for any number of workers. The Q table is placed once in shared memory and mapped read-only by every worker instead of
+being pickled with each task.
+
+Usage:
+>>> result = evaluate_policy(make_env, agent, n_episodes=10000, root_seed=0, n_workers=8)
+>>> result.mean, result.confidence_interval(0.95), result.quantiles([0.05, 0.5, 0.95])
+"""
+import multiprocessing
+import statistics
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..agents.q_table import QTable
+
+__author__ = 'Aditya Gudimella'
+
+# Set in every worker by _init_worker
+_worker = {}
+
+
+class EvaluationResult:
+    """
+    Per-episode returns and lengths, ordered by episode id, with summary statistics.
+    """
+
+    def __init__(self, returns, lengths):
+        self.returns = np.asarray(returns, dtype=float)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.returns)
+
+    @property
+    def mean(self):
+        return self.returns.mean()
+
+    @property
+    def std(self):
+        return self.returns.std(ddof=1) if len(self) > 1 else 0.
+
+    def confidence_interval(self, confidence=0.95):
+        """
+        Normal approximation of the confidence interval of the mean return.
+
+        :param confidence: float in (0, 1)
+        :return: (low, high)
+        """
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        half_width = z * self.std / np.sqrt(len(self))
+        return self.mean - half_width, self.mean + half_width
+
+    def quantiles(self, q=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """
+        :param q: iterable of floats in [0, 1]
+        :return: dict mapping each q to the corresponding quantile of the returns
+        """
+        return dict(zip(q, np.quantile(self.returns, q).tolist()))
+
+    def __repr__(self):
+        low, high = self.confidence_interval()
+        return (f'{self.__class__.__name__}(episodes={len(self)}, mean={self.mean:.4f}, '
+                f'ci95=({low:.4f}, {high:.4f}), mean_length={self.lengths.mean():.2f})')
+
+
+def episode_seeds(root_seed, n_episodes) -> np.ndarray:
+    """
+    One independent seed per episode, derived from root_seed.
+
+    :return: uint32 ndarray of shape (n_episodes,)
+    """
+    return np.array([child.generate_state(1)[0]
+                     for child in np.random.SeedSequence(root_seed).spawn(n_episodes)], dtype=np.uint32)
+
+
+def run_episode(env, agent, seed, stochastic=False, max_steps=None):
+    """
+    Plays one episode with the agent's policy.
+
+    The global numpy random state is seeded with seed for the duration of the episode, since both agents and
+    environments in this package draw from it, and restored afterwards. Environments with a seed method (like gym
+    environments) are seeded as well.
+
+    :return: (total reward, number of steps)
+    """
+    random_state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        if hasattr(env, 'seed'):
+            env.seed(int(seed))
+        state = env.reset()
+        total_reward, n_steps, done = 0., 0, False
+        while not done and (max_steps is None or n_steps < max_steps):
+            state, reward, done, _ = env.step(agent.act(state, stochastic=stochastic))
+            total_reward += reward
+            n_steps += 1
+    finally:
+        np.random.set_state(random_state)
+    return total_reward, n_steps
+
+
+def iter_episodes(env_factory, agent, n_episodes, root_seed=0, n_workers=None, stochastic=False, max_steps=None,
+                  chunk_size=None):
+    """
+    Runs n_episodes evaluation episodes and yields (episode id, total reward, number of steps) in episode order as
+    they complete.
+
+    :param env_factory: picklable callable without arguments returning a new environment
+    :param agent: QTable (or subclass) whose policy is evaluated. It is not modified. With several workers, agent must
+    act with QTable.act, since workers only receive its Q table.
+    :param n_episodes:
+    :param root_seed: int. Seeds of all episodes are derived from it.
+    :param n_workers: Number of worker processes. Defaults to the number of cores. 0 or 1 runs in this process.
+    :param stochastic: passed to agent.act
+    :param max_steps: Episodes are truncated after this many steps. None means no limit.
+    :param chunk_size: Number of episodes sent to a worker at a time.
+    """
+    seeds = episode_seeds(root_seed, n_episodes)
+    n_workers = multiprocessing.cpu_count() if n_workers is None else n_workers
+    if n_workers <= 1:
+        env = env_factory()
+        for episode_id, seed in enumerate(seeds):
+            yield (episode_id,) + run_episode(env, agent, seed, stochastic=stochastic, max_steps=max_steps)
+        return
+
+    chunk_size = max(1, n_episodes // (4 * n_workers)) if chunk_size is None else chunk_size
+    chunks = [(start, seeds[start:start + chunk_size]) for start in range(0, n_episodes, chunk_size)]
+    agent_shell, q_table = _policy_shell(agent), agent._q_table
+    memory = shared_memory.SharedMemory(create=True, size=max(q_table.nbytes, 1))
+    try:
+        np.ndarray(q_table.shape, dtype=q_table.dtype, buffer=memory.buf)[...] = q_table
+        init_args = (env_factory, agent_shell, memory.name, q_table.shape, q_table.dtype.str, stochastic, max_steps)
+        with multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=init_args) as pool:
+            for start, chunk_results in pool.imap(_run_chunk, chunks):
+                for offset, (total_reward, n_steps) in enumerate(chunk_results):
+                    yield start + offset, total_reward, n_steps
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def evaluate_policy(env_factory, agent, n_episodes, root_seed=0, n_workers=None, stochastic=False, max_steps=None,
+                    chunk_size=None) -> EvaluationResult:
+    """
+    Collects the output of iter_episodes into an EvaluationResult. Takes the same arguments.
+    """
+    returns, lengths = np.zeros(n_episodes, dtype=float), np.zeros(n_episodes, dtype=np.int64)
+    for episode_id, total_reward, n_steps in iter_episodes(env_factory, agent, n_episodes, root_seed=root_seed,
+                                                           n_workers=n_workers, stochastic=stochastic,
+                                                           max_steps=max_steps, chunk_size=chunk_size):
+        returns[episode_id], lengths[episode_id] = total_reward, n_steps
+    return EvaluationResult(returns=returns, lengths=lengths)
+
+
+def _policy_shell(agent) -> QTable:
+    """
+    A QTable without its table, holding only what act needs. Subclasses of QTable carry other table sized state
+    (traces, models, priorities) which must not be pickled to every worker.
+    """
+    if not isinstance(agent, QTable) or type(agent).act is not QTable.act:
+        raise TypeError(f'Parallel evaluation needs a QTable agent using QTable.act, got {type(agent).__name__}. '
+                        f'Use n_workers=1 for other agents.')
+    shell = QTable.__new__(QTable)
+    shell.action_dim, shell.state_dim = agent.action_dim, agent.state_dim
+    shell.params = agent.params
+    shell.discount_factor, shell.learning_rate = agent.discount_factor, agent.learning_rate
+    shell._q_table = None
+    return shell
+
+
+def _init_worker(env_factory, agent_shell, memory_name, shape, dtype, stochastic, max_steps):
+    memory = shared_memory.SharedMemory(name=memory_name)
+    q_table = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+    q_table.flags.writeable = False
+    agent_shell._q_table = q_table
+    # Keep a reference to memory, otherwise the buffer behind q_table is released
+    _worker.update(env=env_factory(), agent=agent_shell, memory=memory, stochastic=stochastic, max_steps=max_steps)
+
+
+def _run_chunk(chunk):
+    start, seeds = chunk
+    return start, [run_episode(_worker['env'], _worker['agent'], seed, stochastic=_worker['stochastic'],
+                               max_steps=_worker['max_steps'])
+                   for seed in seeds]
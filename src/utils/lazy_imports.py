@@ -0,0 +1,40 @@
+"""
+Helpers to load package attributes lazily through module level __getattr__ (PEP 562).
+
+Usage, in a package's __init__.py:
+>>> __getattr__, __dir__, __all__ = lazy_attributes(__name__, globals(), {'QTable': '.q_table'})
+"""
+import importlib
+
+__author__ = 'Aditya Gudimella'
+
+
+def lazy_attributes(package_name, package_globals, attributes, submodules=()):
+    """
+    Builds the __getattr__ and __dir__ functions of a package whose attributes live in submodules.
+
+    The submodule defining an attribute is only imported the first time the attribute is accessed. The attribute is
+    then cached in the package's globals so that later lookups don't go through __getattr__ again.
+
+    :param package_name: __name__ of the package
+    :param package_globals: globals() of the package
+    :param attributes: dict mapping attribute name to the (relative) name of the submodule that defines it
+    :param submodules: iterable of (relative) submodule names that can be accessed as attributes of the package
+    :return: (__getattr__, __dir__, __all__)
+    """
+    submodules = {name.lstrip('.') for name in submodules}
+
+    def __getattr__(name):
+        if name in attributes:
+            value = getattr(importlib.import_module(attributes[name], package_name), name)
+        elif name in submodules:
+            value = importlib.import_module(f'.{name}', package_name)
+        else:
+            raise AttributeError(f'module {package_name!r} has no attribute {name!r}')
+        package_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(package_globals) | set(attributes) | submodules)
+
+    return __getattr__, __dir__, list(attributes)
@@ -1,35 +1,49 @@
-import attrdict
 import logging
-from numpy import copy
 
 
 class RLMetrics:
     def __init__(self):
-        `
-        ""
+        pass
 
 class Model:
     def __init__(self, env, agent):
         self.env = env
         self.agent = agent
 
-    def train(self, num_iters, logger=None, log_stats=False):
+    def train(self, num_iters, logger=None, log_stats=False, recorder=None):
+        """
+        Trains the agent with one train_dict per step, holding state, action, new_state, reward, done and new_action.
+
+        :param num_iters: Number of episodes
+        :param logger:
+        :param log_stats:
+        :param recorder: Optional TrajectoryRecorder every transition is recorded to
+        :return:
+        """
+        import attrdict  # Optional dependency, only needed for training
+        from numpy import copy
         for i in range(num_iters):
             state = self.env.reset()
+            action = self.agent.act(state)
             done = False
             while not done:
-                action = self.agent.act(state)
                 new_state, reward, done, _ = self.env.step(action)
+                # The next action is chosen before the update, since on-policy agents (SarsaLambda) bootstrap from it
+                new_action = self.agent.act(new_state)
                 train_dict = attrdict.AttrDict(dict(state=state,
                                                     action=action,
                                                     new_state=new_state,
-                                                    reward=reward))
+                                                    reward=reward,
+                                                    done=done,
+                                                    new_action=new_action))
                 self.agent.train(train_dict)
+                if recorder is not None:
+                    recorder.record(state, action, reward, new_state, done)
 
                 if log_stats:
                     self.stats(logger=logger)
 
-                state = copy(new_state)
+                state, action = copy(new_state), new_action
 
     def stats(self, logger: logging.Logger):
         logger.info('Log some stats here after some test passes')
@@ -0,0 +1,255 @@
+"""
+Grid and random hyperparameter sweeps run across a process pool, with successive halving and an on-disk result cache.
+
+A trial is a picklable callable trial_fn(config, seed, budget) -> score. Every finished trial is written to the cache
+right away, keyed by a stable hash of (trial id, config, seed, budget), so a rerun after a crash skips the finished
+trials. The trial id identifies trial_fn and its settings, so sweeps with different trial functions can share a cache.
+
+Usage:
+>>> configs = grid(exploration_rate=[0.1, 0.3], discount_factor=[0.9, 0.99], learning_rate=[0.05, 0.1, 0.5])
+>>> trial = QTableTrial(make_frozen_lake)
+>>> results = run_sweep(trial, configs, seeds=[0, 1, 2], budgets=[100, 300, 900], cache_dir='sweeps/frozen_lake')
+>>> results[0]['config'], results[0]['score']
+"""
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+__author__ = 'Aditya Gudimella'
+
+log = logging.getLogger(__name__)
+
+
+def grid(**space):
+    """
+    Cartesian product of the values given for every parameter.
+
+    :param space: parameter name -> list of values
+    :return: list of config dicts
+    """
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(n_configs, seed=0, **space):
+    """
+    Samples configs at random.
+
+    :param n_configs: Number of configs to sample
+    :param seed: Seed of the sampler
+    :param space: parameter name -> list of values to choose from, or a (low, high) tuple to sample uniformly from
+    :return: list of config dicts
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_configs):
+        config = {}
+        for name in sorted(space):
+            values = space[name]
+            if isinstance(values, tuple):
+                config[name] = float(rng.uniform(*values))
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.append(config)
+    return configs
+
+
+def _stable_json(obj):
+    """
+    json default for objects that aren't json serializable. Unlike repr, it doesn't depend on memory addresses, and it
+    refuses objects it can't identify stably (lambdas, closures, objects without attributes) rather than letting
+    different trials share a cache key.
+    """
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    if isinstance(obj, functools.partial):
+        return {'__class__': 'functools.partial', 'func': obj.func, 'args': obj.args, 'keywords': obj.keywords}
+    if inspect.ismethod(obj):
+        return {'__self__': obj.__self__, '__func__': obj.__func__}
+    if hasattr(obj, '__qualname__'):  # functions and classes
+        if '<lambda>' in obj.__qualname__ or '<locals>' in obj.__qualname__:
+            raise TypeError(f'{obj.__qualname__} has no stable identity. Pass sweep_id to run_sweep instead.')
+        return f'{obj.__module__}.{obj.__qualname__}'
+    if hasattr(obj, '__dict__'):
+        return {'__class__': _stable_json(type(obj)), **vars(obj)}
+    raise TypeError(f'Objects of type {type(obj).__name__} have no stable identity. Pass sweep_id to run_sweep '
+                    f'instead.')
+
+
+def trial_id(trial_fn):
+    """
+    Identifies a trial function by its qualified name and, for callable objects and partials, their attributes and
+    arguments.
+
+    :raises TypeError: if trial_fn is or holds a lambda, a closure or another object without a stable identity
+    """
+    return json.dumps(trial_fn, sort_keys=True, default=_stable_json)
+
+
+def trial_key(config, seed, budget, trial_id=None):
+    """
+    Stable hash identifying a trial, independent of dict ordering and of the Python process.
+    """
+    payload = json.dumps(dict(trial_id=trial_id, config=config, seed=seed, budget=budget), sort_keys=True,
+                         default=_stable_json)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Stores one json file per finished trial in directory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, result) -> None:
+        # Write to a temporary file first so that a crash never leaves a half written result behind
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f, default=repr)
+        os.replace(tmp_path, self._path(key))
+
+
+def run_sweep(trial_fn, configs, seeds=(0,), budgets=(None,), cache_dir=None, n_workers=None, reduction_factor=3,
+              maximize=True, sweep_id=None):
+    """
+    Runs every config with every seed, using successive halving when several budgets are given.
+
+    At each budget (rung), all surviving configs are run with every seed and scored by their mean score over seeds.
+    Only the best 1 / reduction_factor of them move on to the next, larger budget.
+
+    :param trial_fn: picklable callable (config, seed, budget) -> float
+    :param configs: list of config dicts. Values must be json serializable to get stable cache keys.
+    :param seeds: Seeds every config is run with
+    :param budgets: Increasing budgets (e.g. number of training episodes), one per rung. The default runs every
+    config once with budget None.
+    :param cache_dir: Directory of the result cache. None disables caching.
+    :param n_workers: Number of worker processes. Defaults to the number of cores. 0 or 1 runs in this process.
+    :param reduction_factor: Fraction of configs dropped at each rung is 1 - 1 / reduction_factor
+    :param maximize: Whether higher scores are better
+    :param sweep_id: Identifier of trial_fn in the cache keys. Defaults to trial_id(trial_fn), and is required when
+    trial_fn can't be identified stably (e.g. lambdas and closures).
+    :return: list of dict(config, budget, score, seed_scores) for the configs of the last rung, best first
+    """
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    sweep_id = trial_id(trial_fn) if sweep_id is None else sweep_id
+    n_workers = multiprocessing.cpu_count() if n_workers is None else n_workers
+    survivors = list(configs)
+    results = []
+    for rung, budget in enumerate(budgets):
+        scores = _run_trials(trial_fn, survivors, seeds, budget, cache, n_workers, sweep_id)
+        results = [dict(config=config, budget=budget, score=float(np.mean(config_scores)),
+                        seed_scores=config_scores)
+                   for config, config_scores in zip(survivors, scores)]
+        results.sort(key=lambda result: result['score'], reverse=maximize)
+        log.info('Rung %d with budget %s: best score %s with %s', rung, budget, results[0]['score'],
+                 results[0]['config'])
+        if rung < len(budgets) - 1:
+            survivors = [result['config'] for result in results[:max(1, len(results) // reduction_factor)]]
+    return results
+
+
+def _run_trials(trial_fn, configs, seeds, budget, cache, n_workers, sweep_id):
+    """
+    :return: list with, for every config, the list of its scores for every seed
+    """
+    scores = [[None] * len(seeds) for _ in configs]
+    pending = {}
+    for i, config in enumerate(configs):
+        for j, seed in enumerate(seeds):
+            key = trial_key(config, seed, budget, trial_id=sweep_id)
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                scores[i][j] = cached['score']
+            else:
+                pending[key] = (i, j, config, seed)
+    log.info('Running %d trials with budget %s, %d found in cache', len(pending), budget,
+             len(configs) * len(seeds) - len(pending))
+
+    def record(key, score):
+        i, j, config, seed = pending[key]
+        scores[i][j] = score
+        if cache is not None:
+            cache.put(key, dict(config=config, seed=seed, budget=budget, score=score))
+
+    if n_workers <= 1:
+        for key, (_, _, config, seed) in pending.items():
+            record(key, float(trial_fn(config, seed, budget)))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(trial_fn, config, seed, budget): key
+                       for key, (_, _, config, seed) in pending.items()}
+            for future in as_completed(futures):
+                record(futures[future], float(future.result()))
+    return scores
+
+
+class QTableTrial:
+    """
+    Trains a QTable with epsilon-greedy exploration for budget episodes (n_train_episodes if budget is None) and scores
+    it by its mean greedy return.
+
+    Config keys that are arguments of QTableParams configure the agent. All other keys are passed to env_factory.
+    Environments must follow the gym interface (action_space.n, observation_space.n, reset, step).
+    """
+    AGENT_KEYS = ('exploration_rate', 'discount_factor', 'learning_rate')
+
+    def __init__(self, env_factory, n_eval_episodes=100, max_steps=None, n_train_episodes=1000):
+        """
+
+        :param env_factory: picklable callable taking the environment config as keyword arguments
+        :param n_eval_episodes: Number of episodes the trained greedy policy is evaluated on
+        :param max_steps: Maximum number of steps per episode. None means no limit.
+        :param n_train_episodes: Number of training episodes when the sweep gives no budget
+        """
+        self.env_factory = env_factory
+        self.n_train_episodes = n_train_episodes
+        self.n_eval_episodes = n_eval_episodes
+        self.max_steps = max_steps
+
+    def __call__(self, config, seed, budget):
+        from ..agents import QTable, QTableParams
+        from .evaluation import evaluate_policy
+
+        agent_config = {key: value for key, value in config.items() if key in self.AGENT_KEYS}
+        env_config = {key: value for key, value in config.items() if key not in self.AGENT_KEYS}
+        env = self.env_factory(**env_config)
+        params = QTableParams(**agent_config)
+        agent = QTable(action_dim=env.action_space.n, state_dim=env.observation_space.n, params=params)
+
+        np.random.seed(seed)
+        if hasattr(env, 'seed'):
+            env.seed(seed)
+        for _ in range(self.n_train_episodes if budget is None else budget):
+            state, done, n_steps = env.reset(), False, 0
+            while not done and (self.max_steps is None or n_steps < self.max_steps):
+                if np.random.rand() < params.exploration_rate:
+                    action = np.random.randint(agent.action_dim)
+                else:
+                    action = agent.act(state, stochastic=False)
+                new_state, reward, done, _ = env.step(action)
+                agent.train(dict(state=state, action=action, new_state=new_state, reward=reward))
+                state, n_steps = new_state, n_steps + 1
+        result = evaluate_policy(lambda: env, agent, n_episodes=self.n_eval_episodes, root_seed=seed, n_workers=1,
+                                 max_steps=self.max_steps)
+        return result.mean
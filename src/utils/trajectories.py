@@ -0,0 +1,230 @@
+"""
+Columnar on-disk storage of transitions, for offline training and analysis on datasets larger than memory.
+
+Transitions are buffered in memory and written in fixed-size chunks, one .npy file per column and chunk:
+    directory/meta.json
+    directory/chunk_000000/{state, action, reward, new_state, done, episode_id}.npy
+    ...
+The reader memory-maps the chunks, so only the minibatches being used are loaded into RAM.
+
+Usage:
+>>> with TrajectoryRecorder('data/frozen_lake') as recorder:
+...     Model(env, agent).train(num_iters=1000, recorder=recorder)
+>>> reader = TrajectoryReader('data/frozen_lake')
+>>> train_offline(agent, reader, n_epochs=10, batch_size=1024)
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+__author__ = 'Aditya Gudimella'
+
+COLUMNS = ('state', 'action', 'reward', 'new_state', 'done', 'episode_id')
+
+
+class TrajectoryRecorder:
+    """
+    Appends transitions to a trajectory store, flushing one chunk to disk every chunk_size transitions.
+
+    Column shapes and dtypes are taken from the first transition recorded, unless given explicitly.
+    """
+
+    def __init__(self, directory, chunk_size=65536, state_shape=None, state_dtype=None, action_dtype=None):
+        """
+
+        :param directory: Directory of the store. Recording into an existing store appends to it, refilling its last
+        chunk first if it is partial.
+        :param chunk_size: Number of transitions per chunk
+        :param state_shape: Shape of a single state. () for integer states.
+        :param state_dtype:
+        :param action_dtype:
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            chunk_size, state_shape = meta['chunk_size'], tuple(meta['state_shape'])
+            state_dtype, action_dtype = meta['state_dtype'], meta['action_dtype']
+        self.chunk_size = chunk_size
+        self.n_chunks = len(_chunk_directories(directory))
+        self.episode_id = _last_episode_id(directory) + 1
+        self._buffers = None
+        self._n_buffered = 0
+        if state_shape is not None:
+            self._allocate(tuple(state_shape), np.dtype(state_dtype or float), np.dtype(action_dtype or np.int64))
+            if self.n_chunks:
+                self._reopen_last_chunk()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, state, action, reward, new_state, done) -> None:
+        """
+        Appends one transition. The episode id is incremented after every transition with done=True.
+        """
+        if self._buffers is None:
+            state = np.asarray(state)
+            self._allocate(state.shape, state.dtype, np.asarray(action).dtype)
+        i = self._n_buffered
+        buffers = self._buffers
+        buffers['state'][i], buffers['action'][i], buffers['reward'][i] = state, action, reward
+        buffers['new_state'][i], buffers['done'][i], buffers['episode_id'][i] = new_state, done, self.episode_id
+        self._n_buffered += 1
+        if done:
+            self.episode_id += 1
+        if self._n_buffered == self.chunk_size:
+            self.flush()
+
+    def record_batch(self, state, action, reward, new_state, done, episode_id) -> None:
+        """
+        Appends a batch of transitions, e.g. from batched environments. All arguments are arrays with the same first
+        dimension. Episode ids are taken as given.
+        """
+        columns = dict(state=state, action=action, reward=reward, new_state=new_state, done=done,
+                       episode_id=episode_id)
+        columns = {name: np.asarray(value) for name, value in columns.items()}
+        if self._buffers is None:
+            self._allocate(columns['state'].shape[1:], columns['state'].dtype, columns['action'].dtype)
+        n_transitions, start = len(columns['state']), 0
+        while start < n_transitions:
+            n = min(self.chunk_size - self._n_buffered, n_transitions - start)
+            for name, value in columns.items():
+                self._buffers[name][self._n_buffered:self._n_buffered + n] = value[start:start + n]
+            self._n_buffered += n
+            start += n
+            if self._n_buffered == self.chunk_size:
+                self.flush()
+        self.episode_id = max(self.episode_id, int(columns['episode_id'].max(initial=-1)) + 1)
+
+    def flush(self) -> None:
+        """
+        Writes the buffered transitions to a new chunk. Only the last chunk of a store is smaller than chunk_size,
+        unless flush is called explicitly.
+        """
+        if not self._n_buffered:
+            return
+        chunk_directory = os.path.join(self.directory, f'chunk_{self.n_chunks:06d}')
+        # Write into a temporary directory first so that readers never see a partially written chunk
+        tmp_directory = chunk_directory + '.tmp'
+        os.makedirs(tmp_directory, exist_ok=True)
+        for name, buffer in self._buffers.items():
+            np.save(os.path.join(tmp_directory, f'{name}.npy'), buffer[:self._n_buffered])
+        if os.path.exists(chunk_directory):
+            # The partial last chunk of a reopened store is being refilled. Move it aside, since os.replace can't
+            # replace a non-empty directory.
+            old_directory = chunk_directory + '.old.tmp'
+            os.replace(chunk_directory, old_directory)
+            os.replace(tmp_directory, chunk_directory)
+            shutil.rmtree(old_directory)
+        else:
+            os.replace(tmp_directory, chunk_directory)
+        self.n_chunks += 1
+        self._n_buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def _reopen_last_chunk(self):
+        """
+        Loads a partial last chunk back into the buffers, so that it is refilled and rewritten instead of being
+        followed by a new chunk.
+        """
+        chunk_directory = _chunk_directories(self.directory)[-1]
+        chunk = {name: np.load(os.path.join(chunk_directory, f'{name}.npy')) for name in COLUMNS}
+        n_transitions = len(chunk['action'])
+        if n_transitions < self.chunk_size:
+            for name, column in chunk.items():
+                self._buffers[name][:n_transitions] = column
+            self._n_buffered = n_transitions
+            self.n_chunks -= 1
+
+    def _allocate(self, state_shape, state_dtype, action_dtype):
+        self._buffers = dict(state=np.zeros((self.chunk_size,) + state_shape, dtype=state_dtype),
+                             action=np.zeros(self.chunk_size, dtype=action_dtype),
+                             reward=np.zeros(self.chunk_size, dtype=float),
+                             new_state=np.zeros((self.chunk_size,) + state_shape, dtype=state_dtype),
+                             done=np.zeros(self.chunk_size, dtype=bool),
+                             episode_id=np.zeros(self.chunk_size, dtype=np.int64))
+        meta = dict(chunk_size=self.chunk_size, state_shape=list(state_shape), state_dtype=np.dtype(state_dtype).str,
+                    action_dtype=np.dtype(action_dtype).str)
+        with open(self._meta_path, 'w') as f:
+            json.dump(meta, f)
+
+
+class TrajectoryReader:
+    """
+    Memory-maps every chunk of a trajectory store.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.chunks = [{name: np.load(os.path.join(chunk_directory, f'{name}.npy'), mmap_mode='r')
+                        for name in COLUMNS}
+                       for chunk_directory in _chunk_directories(directory)]
+
+    def __len__(self):
+        return sum(len(chunk['action']) for chunk in self.chunks)
+
+    def column(self, name) -> np.ndarray:
+        """
+        Loads a whole column into memory. Meant for small columns like reward, done or episode_id.
+        """
+        return np.concatenate([chunk[name] for chunk in self.chunks])
+
+    def minibatches(self, batch_size, shuffle=True, seed=None):
+        """
+        Yields every transition once, in dicts of arrays with at most batch_size transitions.
+
+        Shuffling visits the chunks in random order and shuffles transitions within each chunk, so that only one chunk
+        is paged in at a time.
+
+        :param batch_size:
+        :param shuffle:
+        :param seed: Seed of the shuffling
+        """
+        rng = np.random.default_rng(seed)
+        chunk_order = rng.permutation(len(self.chunks)) if shuffle else range(len(self.chunks))
+        for chunk_id in chunk_order:
+            chunk = self.chunks[chunk_id]
+            n_transitions = len(chunk['action'])
+            order = rng.permutation(n_transitions) if shuffle else np.arange(n_transitions)
+            for start in range(0, n_transitions, batch_size):
+                indices = np.sort(order[start:start + batch_size])  # Sorted indices read the memory map sequentially
+                yield {name: column[indices] for name, column in chunk.items()}
+
+
+def train_offline(agent, reader: TrajectoryReader, n_epochs=1, batch_size=1024, shuffle=True, seed=None):
+    """
+    Trains agent on the stored transitions with batched updates.
+
+    :param agent: Object with a train_batch method taking a dict of arrays (like QTable or LinearQ)
+    :param reader:
+    :param n_epochs: Number of passes over the store
+    :param batch_size:
+    :param shuffle:
+    :param seed: Seed of the shuffling
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(n_epochs):
+        for batch in reader.minibatches(batch_size, shuffle=shuffle, seed=rng.integers(2 ** 32)):
+            agent.train_batch(batch)
+
+
+def _chunk_directories(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('chunk_') and not name.endswith('.tmp'))
+
+
+def _last_episode_id(directory):
+    chunks = _chunk_directories(directory)
+    if not chunks:
+        return -1
+    episode_ids = np.load(os.path.join(chunks[-1], 'episode_id.npy'), mmap_mode='r')
+    return int(episode_ids[-1]) if len(episode_ids) else -1
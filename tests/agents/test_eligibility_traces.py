@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.agents import EligibilityTraces, LambdaParams, QTable, SarsaLambda, WatkinsQLambda
+
+
+def _walk_chain(agent, n_states, episodes):
+    """Always move right along a chain of n_states states. Only the last transition is rewarded."""
+    for _ in range(episodes):
+        for state in range(n_states - 1):
+            agent.train(dict(state=state, action=0, new_state=state + 1, new_action=0,
+                             reward=float(state == n_states - 2), done=state == n_states - 2))
+
+
+def test_traces_propagate_reward_in_one_episode():
+    q_table, sarsa, watkins = (cls(action_dim=1, state_dim=10, params=LambdaParams(trace_decay=1.))
+                               for cls in (QTable, SarsaLambda, WatkinsQLambda))
+    for agent in (q_table, sarsa, watkins):
+        _walk_chain(agent, n_states=10, episodes=1)
+    assert np.count_nonzero(q_table._q_table) == 1
+    assert np.count_nonzero(sarsa._q_table) == 9
+    assert np.allclose(sarsa._q_table, watkins._q_table)
+
+
+def test_traces_below_cutoff_are_dropped():
+    traces = EligibilityTraces(state_dim=5, action_dim=2, capacity=1)
+    for state in range(5):
+        traces.visit(state, 1, mode='accumulating')
+        traces.decay(0.5, cutoff=0.1)
+    states, actions, values = traces.active
+    assert np.array_equal(np.sort(states), [2, 3, 4])
+    assert np.allclose(np.sort(values), [0.125, 0.25, 0.5])
+    assert np.array_equal(traces.slots[states, actions], np.arange(len(traces)))
+
+
+def test_watkins_greedy_check_uses_values_before_the_update():
+    agent = WatkinsQLambda(action_dim=2, state_dim=1)
+    agent._q_table[0] = [1., 0.9]
+    # new_action 0 is greedy before the update, even though the update makes action 1 greedy
+    agent.train(dict(state=0, action=1, new_state=0, new_action=0, reward=10.))
+    assert agent._q_table[0, 1] > agent._q_table[0, 0]
+    assert len(agent.traces) == 1
+
+
+class _Chain:
+    """Action 1 moves right, action 0 moves left. Reaching the last state ends the episode with reward 1."""
+
+    def __init__(self, n_states):
+        self.n_states, self.state = n_states, 0
+
+    def reset(self):
+        self.state = 0
+        return self.state
+
+    def step(self, action):
+        self.state = max(0, self.state + (1 if action == 1 else -1))
+        done = self.state == self.n_states - 1
+        return self.state, float(done), done, {}
+
+
+def test_lambda_agents_train_through_model():
+    pytest.importorskip('attrdict')
+    from src.utils.run_utils import Model
+
+    np.random.seed(0)
+    for cls in (SarsaLambda, WatkinsQLambda):
+        agent = cls(action_dim=2, state_dim=5, params=LambdaParams(learning_rate=0.5))
+        Model(_Chain(n_states=5), agent).train(num_iters=20)
+        # Episodes end with done, which clears the traces
+        assert len(agent.traces) == 0
+        # Values grow towards the rewarded end of the chain
+        assert np.all(np.diff(agent._q_table[:4].max(axis=1)) > 0)
+        assert agent._q_table[3, 1] > 0.5
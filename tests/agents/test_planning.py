@@ -0,0 +1,76 @@
+import heapq
+
+import numpy as np
+
+from src.agents import DynaQ, PlanningParams, PrioritizedSweeping, TabularModel
+
+
+def test_model_tracks_transition_counts_and_mean_rewards():
+    model = TabularModel(state_dim=3, action_dim=2, capacity=1)
+    for new_state, reward in [(1, 1.), (2, 0.), (1, 2.), (1, 0.)]:
+        model.update(0, 1, reward, new_state)
+    model.update(2, 0, 5., 1, done=True)
+    assert model.n_slots == 3
+    assert np.isclose(model.mean_rewards(np.array([1]))[0], 0.75)
+    assert np.array_equal(model.predecessors([1]), [1, 4])
+    # r + 0.5 * (3/4 * V(1) + 1/4 * V(2)), and no bootstrapping after the terminal transition
+    targets = model.expected_targets(np.array([1, 4]), np.array([[0., 0.], [4., 1.], [3., 8.]]), discount_factor=0.5)
+    assert np.allclose(targets, [0.75 + 0.5 * (3 + 2), 5.])
+
+
+def test_dyna_q_planning_batches_do_not_diverge():
+    """3 states, 2 actions, every step is rewarded and leads to the next state: Q should approach 1 / (1 - 0.9)."""
+    agent = DynaQ(action_dim=2, state_dim=3, params=PlanningParams(planning_steps=200),
+                  rng=np.random.default_rng(0))
+    for step in range(300):
+        agent.train(dict(state=step % 3, action=(step // 3) % 2, new_state=(step + 1) % 3, reward=1.))
+    assert np.all(agent._q_table <= 10.)
+    assert np.allclose(agent._q_table, 10., atol=0.5)
+
+
+def test_prioritized_sweeping_converges_on_a_chain():
+    """Moving right along 5 states, only the last step is rewarded and ends the episode."""
+    agent = PrioritizedSweeping(action_dim=1, state_dim=5, params=PlanningParams(planning_steps=50,
+                                                                                 learning_rate=0.5))
+    for _ in range(20):
+        for state in range(4):
+            agent.train(dict(state=state, action=0, new_state=state + 1, reward=float(state == 3), done=state == 3))
+    assert np.allclose(agent._q_table[:4, 0], 0.9 ** np.arange(3, -1, -1), atol=1e-2)
+
+
+def test_pop_skips_stale_heap_entries():
+    agent = PrioritizedSweeping(action_dim=2, state_dim=2)
+    for pair, priority in [(0, 5.), (1, 3.), (2, 1.)]:
+        heapq.heappush(agent._queue, (-priority, pair))
+    # Pair 0 was re-prioritized since it was queued, and pair 2 was queued again with a higher priority
+    agent.priorities[[0, 1, 2]] = [0.5, 3., 4.]
+    heapq.heappush(agent._queue, (-4., 2))
+    assert np.array_equal(agent._pop(2), [2, 1])
+    assert agent._pop(5).size == 0
+
+
+def test_lookups_cover_indexed_and_new_slots():
+    rng = np.random.default_rng(0)
+    model = TabularModel(state_dim=50, action_dim=2)
+    model.min_unindexed = 16
+    for _ in range(20):
+        for state, action, new_state in rng.integers(0, [50, 2, 50], size=(30, 3)):
+            model.update(state, action, 0., new_state)
+        sa = rng.integers(100, size=5)
+        slots, group = model.successors(sa)
+        expected = [np.flatnonzero(model.slot_sa[:model.n_slots] == pair) for pair in sa]
+        assert [sorted(slots[group == i]) for i in range(5)] == [list(pair_slots) for pair_slots in expected]
+        assert np.array_equal(model.predecessors([7]), np.unique(model.slot_sa[:model.n_slots][
+            model.slot_next_state[:model.n_slots] == 7]))
+    assert 0 < model._n_indexed <= model.n_slots
+
+
+def test_model_samples_observed_pairs_uniformly():
+    model = TabularModel(state_dim=3, action_dim=1)
+    for _ in range(98):
+        model.update(0, 0, 0., 1)
+    model.update(1, 0, 0., 2)
+    model.update(1, 0, 0., 0)
+    slots = model.sample(20000, np.random.default_rng(0))
+    # Pair 0 and pair 1 are equally likely, and each of the two transitions of pair 1 half as likely
+    assert np.allclose(np.bincount(slots, minlength=3) / len(slots), [0.5, 0.25, 0.25], atol=0.02)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.agents import LinearQ, QTableParams, TileCoder
+
+
+class Interval:
+    """Stands in for a Domain, which needs Ranger."""
+
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def lowerEndpoint(self):
+        return self.low
+
+    def upperEndpoint(self):
+        return self.high
+
+
+def test_tiles_are_in_range_and_spread_out():
+    coder = TileCoder(lows=[0., -1.], highs=[1., 1.], n_tilings=8, tiles_per_dim=10, memory_size=4096)
+    tiles = coder.tiles(np.random.default_rng(0).uniform([0., -1.], [1., 1.], size=(5000, 2)))
+    assert tiles.shape == (5000, 8)
+    assert tiles.min() >= 0 and tiles.max() < 4096
+    # 8 tilings of about 11 x 11 tiles, almost all of which should land in distinct slots
+    assert len(np.unique(tiles)) > 0.9 * 8 * 11 * 11
+
+
+def test_from_domains_uses_domain_bounds():
+    coder = TileCoder.from_domains([Interval(-1.2, 0.6), Interval(-0.07, 0.07)], n_tilings=4)
+    assert np.allclose(coder.lows, [-1.2, -0.07]) and np.allclose(coder.highs, [0.6, 0.07])
+    assert coder.tiles([0., 0.]).shape == (4,)
+
+
+def _fit_sin(batch_size, n_updates):
+    rng = np.random.default_rng(0)
+    agent = LinearQ(action_dim=1, tile_coder=TileCoder(lows=[0.], highs=[1.], tiles_per_dim=10),
+                    params=QTableParams(discount_factor=0.))
+    for _ in range(n_updates):
+        states = rng.random((batch_size, 1))
+        agent.train(dict(state=states, action=np.zeros(batch_size, dtype=int), new_state=states,
+                         reward=np.sin(3 * states[:, 0]), done=np.ones(batch_size, dtype=bool)))
+    test_states = rng.random((1000, 1))
+    return np.abs(agent.state_action_value(test_states, np.zeros(1000, dtype=int)) - np.sin(3 * test_states[:, 0]))
+
+
+def test_linear_q_learns_with_single_samples_and_large_batches():
+    assert _fit_sin(batch_size=1, n_updates=5000).mean() < 0.05
+    assert _fit_sin(batch_size=1024, n_updates=200).mean() < 0.05
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.environments.indexers import BoardIndexer, MixedRadixIndexer, StateIndexer
+
+
+def test_mixed_radix_round_trip():
+    indexer = MixedRadixIndexer(radices=[2, 3, 4], lows=[0, -1, 5])
+    states = indexer.state(np.arange(indexer.n_states))
+    assert indexer.n_states == 24
+    assert np.array_equal(indexer.index(states), np.arange(indexer.n_states))
+
+
+def test_board_indexer_folds_symmetries():
+    indexer = BoardIndexer(board_size=3, symmetric=True)
+    boards = np.random.randint(-1, 2, size=(100, 3, 3))
+    indices = indexer.index(boards)
+    assert indexer.n_states == 2862
+    assert np.array_equal(indexer.index(np.rot90(boards, 1, axes=(1, 2))), indices)
+    assert np.array_equal(indexer.index(np.flip(boards, axis=2)), indices)
+    assert np.array_equal(indexer.index(indexer.state(indices)), indices)
+
+
+def test_symmetric_board_indexer_refuses_large_boards():
+    with pytest.raises(ValueError):
+        BoardIndexer(board_size=4, symmetric=True)
+    assert BoardIndexer(board_size=4).n_states == 3 ** 16
+
+
+def test_state_indexer_is_abstract():
+    with pytest.raises(TypeError):
+        StateIndexer()
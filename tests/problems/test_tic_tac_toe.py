@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.problems.tic_tac_toe import BatchedTicTacToe, Mark
+
+X, O, E = Mark.Χ.value, Mark.Ο.value, Mark.Φ.value
+
+
+def test_winners_and_draws_are_detected():
+    boards = [[[X, X, X], [O, O, E], [E, E, E]],  # row
+              [[O, X, E], [O, X, E], [O, E, E]],  # column
+              [[E, X, O], [X, O, E], [O, E, E]],  # anti-diagonal
+              [[X, O, X], [X, O, O], [O, X, X]],  # draw
+              [[X, E, E], [E, O, E], [E, E, E]]]  # still being played
+    games = BatchedTicTacToe(boards=boards, to_move=X)
+    assert np.array_equal(games.winners, [X, O, O, E, E])
+    assert np.array_equal(games.done, [True, True, True, True, False])
+    assert not games.legal_moves[:4].any()
+
+
+def test_illegal_move_raises():
+    games = BatchedTicTacToe(n_games=2)
+    games.step([4, 4])
+    with pytest.raises(ValueError):
+        games.step([4, 0])
+
+
+def test_finished_games_ignore_their_actions():
+    games = BatchedTicTacToe(boards=[[[X, X, X], [O, O, E], [E, E, E]], np.zeros((3, 3))], to_move=O)
+    before = games.boards[0].copy()
+    games.step([0, 0])
+    assert np.array_equal(games.boards[0], before)
+    assert games.boards[1, 0, 0] == O and games.to_move[0] == O and games.to_move[1] == X
+
+
+def test_recorded_history_shapes():
+    games = BatchedTicTacToe(n_games=50)
+    winners, history = games.play(rng=np.random.default_rng(0), record=True)
+    n_steps = len(history['actions'])
+    assert 5 <= n_steps <= 9
+    assert history['boards'].shape == (n_steps, 50, 3, 3)
+    assert history['to_move'].shape == history['actions'].shape == history['active'].shape == (n_steps, 50)
+    assert np.array_equal(history['active'].sum(axis=0), (games.boards != E).sum(axis=(1, 2)))
+    assert winners.shape == (50,)
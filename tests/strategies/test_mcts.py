@@ -0,0 +1,19 @@
+import numpy as np
+
+from src.problems.tic_tac_toe import Mark
+from src.strategies.mcts import MCTS
+
+X, O, E = Mark.Χ.value, Mark.Ο.value, Mark.Φ.value
+
+
+def _best_move(board):
+    search = MCTS(n_simulations=300, rng=np.random.default_rng(0))
+    return search.search(np.array([board]), [O])[0].argmax()
+
+
+def test_finds_win_in_one():
+    assert _best_move([[O, O, E], [X, X, E], [X, E, E]]) == 2
+
+
+def test_blocks_forced_loss():
+    assert _best_move([[X, X, E], [E, O, E], [E, E, E]]) == 2
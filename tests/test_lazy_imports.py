@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+
+def _modules_loaded_by(statement):
+    probe = f'import sys; {statement}; print(" ".join(sys.modules))'
+    return subprocess.run([sys.executable, '-c', probe], check=True, capture_output=True, text=True).stdout.split()
+
+
+def test_package_import_does_not_load_optional_dependencies():
+    loaded = _modules_loaded_by('import src.environments, src.agents, src.utils.run_utils')
+    for module in ('numpy', 'Ranger', 'attrdict', 'src.environments.indexers', 'src.agents.q_table'):
+        assert module not in loaded
+
+
+def test_attributes_load_their_submodule_on_access():
+    loaded = _modules_loaded_by('from src.environments import BoardIndexer')
+    assert 'src.environments.indexers' in loaded
+    assert 'Ranger' not in loaded
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.agents import LinearQ, QTable, SarsaLambda, TileCoder
+from src.utils.evaluation import _policy_shell, evaluate_policy
+
+
+class RandomWalk:
+    """Walk on [0, 10) starting in the middle. Moves go the wrong way with probability 0.3."""
+
+    def reset(self):
+        self.state = 5
+        return self.state
+
+    def step(self, action):
+        move = 1 if action == 1 else -1
+        self.state += move if np.random.rand() > 0.3 else -move
+        done = self.state in (0, 9)
+        return self.state, float(self.state == 9), done, {}
+
+
+def test_results_do_not_depend_on_worker_count():
+    agent = QTable(action_dim=2, state_dim=10)
+    agent._q_table[:, 1] = 1.
+    serial = evaluate_policy(RandomWalk, agent, n_episodes=200, root_seed=7, n_workers=1)
+    parallel = evaluate_policy(RandomWalk, agent, n_episodes=200, root_seed=7, n_workers=3, chunk_size=16)
+    assert np.array_equal(serial.returns, parallel.returns)
+    assert np.array_equal(serial.lengths, parallel.lengths)
+    low, high = parallel.confidence_interval(0.95)
+    assert low <= parallel.mean <= high
+
+
+def test_serial_evaluation_leaves_global_random_state_alone():
+    np.random.seed(3)
+    expected = np.random.rand()
+    np.random.seed(3)
+    evaluate_policy(RandomWalk, QTable(action_dim=2, state_dim=10), n_episodes=5, n_workers=1)
+    assert np.random.rand() == expected
+
+
+def test_workers_get_a_policy_shell_without_agent_state():
+    agent = SarsaLambda(action_dim=2, state_dim=10)
+    agent._q_table[:, 1] = 1.
+    shell = _policy_shell(agent)
+    assert type(shell) is QTable and not hasattr(shell, 'traces')
+    serial = evaluate_policy(RandomWalk, agent, n_episodes=50, root_seed=1, n_workers=1)
+    parallel = evaluate_policy(RandomWalk, agent, n_episodes=50, root_seed=1, n_workers=2)
+    assert np.array_equal(serial.returns, parallel.returns)
+
+
+class GreedyLeft(QTable):
+    def act(self, state, stochastic=True):
+        return 0
+
+
+def test_parallel_evaluation_refuses_agents_with_their_own_policy():
+    agents = (GreedyLeft(action_dim=2, state_dim=10), LinearQ(action_dim=2, tile_coder=TileCoder(lows=[0], highs=[10])))
+    for agent in agents:
+        evaluate_policy(RandomWalk, agent, n_episodes=2, n_workers=1)
+        with pytest.raises(TypeError):
+            evaluate_policy(RandomWalk, agent, n_episodes=2, n_workers=2)
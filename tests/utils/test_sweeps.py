@@ -0,0 +1,78 @@
+import functools
+import types
+
+import pytest
+
+from src.utils.sweeps import QTableTrial, grid, run_sweep, trial_id
+
+
+class Chain:
+    """Move right (action 1) along a chain of 4 states to reach the rewarding end."""
+    action_space, observation_space = types.SimpleNamespace(n=2), types.SimpleNamespace(n=4)
+
+    def reset(self):
+        self.state = 0
+        return self.state
+
+    def step(self, action):
+        self.state = max(0, self.state + (1 if action == 1 else -1))
+        done = self.state == 3
+        return self.state, float(done), done, {}
+
+
+def quadratic_trial(config, seed, budget):
+    return -(config['x'] - 3) ** 2 + 0.01 * seed
+
+
+def failing_trial(config, seed, budget):
+    raise AssertionError('Finished trials must be read from the cache')
+
+
+def test_successive_halving_reuses_cached_trials(tmp_path):
+    configs = grid(x=list(range(9)))
+    results = run_sweep(quadratic_trial, configs, seeds=[0, 1], budgets=[1, 3], cache_dir=str(tmp_path),
+                        n_workers=2, sweep_id='quadratic')
+    assert [result['config']['x'] for result in results] == [3, 2, 4]
+    rerun = run_sweep(failing_trial, configs, seeds=[0, 1], budgets=[1, 3], cache_dir=str(tmp_path), n_workers=2,
+                      sweep_id='quadratic')
+    assert rerun == results
+
+
+class ShiftedTrial:
+    def __init__(self, shift):
+        self.shift = shift
+
+    def __call__(self, config, seed, budget):
+        return quadratic_trial(config, seed, budget) + self.shift
+
+
+def test_cache_keys_depend_on_the_trial(tmp_path):
+    configs = grid(x=[3])
+    first = run_sweep(ShiftedTrial(0.), configs, cache_dir=str(tmp_path), n_workers=1)
+    second = run_sweep(ShiftedTrial(1.), configs, cache_dir=str(tmp_path), n_workers=1)
+    assert second[0]['score'] == first[0]['score'] + 1.
+    assert trial_id(ShiftedTrial(0.)) == trial_id(ShiftedTrial(0.))
+
+
+def test_q_table_trial_runs_with_default_budget():
+    score = run_sweep(QTableTrial(Chain, n_eval_episodes=2, max_steps=50, n_train_episodes=5),
+                      grid(learning_rate=[0.5]), n_workers=1)[0]['score']
+    assert 0. <= score <= 1.
+
+
+def test_trial_ids_of_partials_include_their_arguments():
+    first, second = (trial_id(QTableTrial(functools.partial(dict, env_id=env_id)))
+                     for env_id in ('FrozenLake-v0', 'Taxi-v3'))
+    assert first != second
+    assert first == trial_id(QTableTrial(functools.partial(dict, env_id='FrozenLake-v0')))
+
+
+def test_trials_without_a_stable_identity_need_a_sweep_id(tmp_path):
+    trial = ShiftedTrial(0.)
+    with pytest.raises(TypeError):
+        trial_id(lambda config, seed, budget: trial(config, seed, budget))
+    with pytest.raises(TypeError):
+        trial_id(QTableTrial(lambda: Chain()))
+    results = run_sweep(lambda config, seed, budget: trial(config, seed, budget), grid(x=[3]),
+                        cache_dir=str(tmp_path), n_workers=1, sweep_id='shifted')
+    assert results[0]['score'] == 0.
@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.agents import LinearQ, QTable, QTableParams, TileCoder
+from src.utils.trajectories import TrajectoryReader, TrajectoryRecorder, train_offline
+
+
+def test_recorded_transitions_are_read_back_in_chunks(tmp_path):
+    with TrajectoryRecorder(str(tmp_path), chunk_size=7) as recorder:
+        for step in range(50):
+            recorder.record(step % 10, step % 2, float(step % 10 == 9), (step + 1) % 10, step % 10 == 9)
+    reader = TrajectoryReader(str(tmp_path))
+    assert len(reader) == 50 and len(reader.chunks) == 8
+    assert np.array_equal(reader.column('episode_id'), np.arange(50) // 10)
+    batches = list(reader.minibatches(batch_size=4, seed=0))
+    assert np.array_equal(np.sort(np.concatenate([batch['state'] for batch in batches])),
+                          np.sort(reader.column('state')))
+
+
+def test_appending_refills_the_partial_last_chunk(tmp_path):
+    for start, stop in ((0, 5), (5, 10), (10, 20)):
+        with TrajectoryRecorder(str(tmp_path), chunk_size=7) as recorder:
+            for step in range(start, stop):
+                recorder.record(step, 0, 0., step + 1, False)
+    reader = TrajectoryReader(str(tmp_path))
+    assert [len(chunk['action']) for chunk in reader.chunks] == [7, 7, 6]
+    assert np.array_equal(reader.column('state'), np.arange(20))
+
+
+def test_offline_training_converges_with_the_default_batch_size(tmp_path):
+    with TrajectoryRecorder(str(tmp_path)) as recorder:
+        for step in range(5000):
+            recorder.record(step % 10, step % 2, float(step % 10 == 9), (step + 1) % 10, step % 10 == 9)
+    reader = TrajectoryReader(str(tmp_path))
+    agent = QTable(action_dim=2, state_dim=10, params=QTableParams(learning_rate=0.5))
+    train_offline(agent, reader, n_epochs=200, seed=0)
+    # Only the transitions out of state 9 are rewarded and they end the episode
+    assert np.allclose(agent._q_table[9, 1], 1.)
+    assert np.abs(agent._q_table).max() <= 1.
+
+
+def test_offline_linear_q_converges_with_the_default_batch_size(tmp_path):
+    states = np.random.default_rng(0).random((5000, 1))
+    with TrajectoryRecorder(str(tmp_path)) as recorder:
+        recorder.record_batch(states, np.zeros(5000, dtype=int), np.sin(3 * states[:, 0]), states,
+                              np.ones(5000, dtype=bool), np.arange(5000))
+    agent = LinearQ(action_dim=1, tile_coder=TileCoder(lows=[0.], highs=[1.], tiles_per_dim=10))
+    train_offline(agent, TrajectoryReader(str(tmp_path)), n_epochs=50, seed=0)
+    assert np.abs(agent.state_action_value(states, np.zeros(5000, dtype=int)) - np.sin(3 * states[:, 0])).mean() < 0.05